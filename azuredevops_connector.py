@@ -13,22 +13,35 @@
 # either express or implied. See the License for the specific language governing permissions
 # and limitations under the License.
 
+import copy
+import ctypes
+import fcntl
 import grp
+import hashlib
 import json
 import os
 import pwd
+import random
+import re
+import select
+import sqlite3
 import sys
+import tempfile
+import threading
 import time
 import urllib.parse as urlparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 
 import encryption_helper
 import phantom.app as phantom
 import phantom.rules as phantom_rules
 import requests
-from bs4 import BeautifulSoup
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotFound, HttpResponseRedirect
 from phantom.action_result import ActionResult
 from phantom.base_connector import BaseConnector
+from phantom.vault import Vault
 
 import azuredevops_consts as consts
 
@@ -59,14 +72,144 @@ def _save_app_state(state, asset_id, app_connector):
         app_connector.debug_print("Saving state: ", state)
 
     try:
-        with open(real_state_file_path, "w") as state_file_obj:
-            state_file_obj.write(json.dumps(state))
+        _write_file_atomically(real_state_file_path, json.dumps(state))
     except Exception as e:
         if app_connector:
             app_connector.error_print(f"Unable to save state file: {e!s}")
     return
 
 
+def _write_file_atomically(file_path, content):
+    """This function is used to replace the content of a file.
+    A temporary file is written and renamed over the file so readers never see a partially written file.
+    The temporary file gets the owner, group and mode of an existing file, a new file gets the mode of the state file.
+    Only root can give a file to another user, so a file the running user cannot give its owner and group to,
+    e.g. a state file created by the REST handler, is rewritten in place instead and keeps its ownership.
+
+    :param file_path: absolute path of the file
+    :param content: string to write
+    """
+
+    try:
+        file_stat = os.stat(file_path)
+    except FileNotFoundError:
+        file_stat = None
+
+    file_dir, file_name = os.path.split(file_path)
+    fd, temp_file_path = tempfile.mkstemp(prefix=file_name, suffix=".tmp", dir=file_dir)
+    try:
+        with os.fdopen(fd, "w") as temp_file_obj:
+            temp_file_obj.write(content)
+
+        if file_stat is None:
+            os.chmod(temp_file_path, consts.STATE_FILE_MODE)
+        else:
+            temp_file_stat = os.stat(temp_file_path)
+            if (temp_file_stat.st_uid, temp_file_stat.st_gid) != (file_stat.st_uid, file_stat.st_gid):
+                try:
+                    os.chown(temp_file_path, file_stat.st_uid, file_stat.st_gid)
+                except PermissionError:
+                    os.remove(temp_file_path)
+                    with open(file_path, "r+") as file_obj:
+                        file_obj.write(content)
+                        file_obj.truncate()
+                    return
+            # The mode is set after the owner, changing the owner clears the setuid and setgid bits
+            os.chmod(temp_file_path, file_stat.st_mode & 0o7777)
+
+        os.replace(temp_file_path, file_path)
+    except Exception:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        raise
+
+
+@contextmanager
+def _watch_directory(directory, app_connector=None):
+    """This function is used to wait for the files written in a directory.
+    It yields a function waiting at most the given number of seconds for a file of the directory to be written.
+    The files are watched with inotify, or checked at the status sleep interval where inotify is not available.
+
+    :param directory: path of the directory
+    :param app_connector: Object of app_connector class
+    """
+
+    inotify_fd = -1
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        inotify_fd = libc.inotify_init1(consts.INOTIFY_IN_CLOEXEC)
+        if (
+            inotify_fd >= 0
+            and libc.inotify_add_watch(inotify_fd, directory.encode(), consts.INOTIFY_IN_CLOSE_WRITE | consts.INOTIFY_IN_MOVED_TO) < 0
+        ):
+            os.close(inotify_fd)
+            inotify_fd = -1
+    except (AttributeError, OSError) as e:
+        if app_connector:
+            app_connector.debug_print(f"inotify is not available, checking the directory periodically: {e!s}")
+
+    if inotify_fd < 0:
+        yield lambda seconds: time.sleep(min(seconds, consts.AZURE_DEVOPS_TC_STATUS_SLEEP))
+        return
+
+    def wait_for_file(seconds):
+        readable, _, _ = select.select([inotify_fd], [], [], seconds)
+        if readable:
+            # Drain the events, the caller checks the files itself
+            os.read(inotify_fd, 4096)
+
+    try:
+        yield wait_for_file
+    finally:
+        os.close(inotify_fd)
+
+
+class AssetFileLockError(OSError):
+    """Raised when an advisory lock of an asset cannot be acquired."""
+
+
+@contextmanager
+def _asset_file_lock(asset_id, file_name, app_connector=None, timeout=None):
+    """This function is used to hold an advisory lock of an asset, shared by all the processes running its actions.
+    The lock is held by file descriptor, it must not be taken again while it is held.
+
+    :param asset_id: asset_id
+    :param file_name: name of the lock file, prefixed with the asset_id
+    :param app_connector: Object of app_connector class
+    :param timeout: seconds to wait for the lock, wait indefinitely if None
+    :raises AssetFileLockError: if the lock file cannot be opened or the lock is not acquired within the timeout,
+        the files it protects must not be written without it
+    """
+
+    lock_file_path = _get_asset_file_path(asset_id, file_name, app_connector)
+    if not lock_file_path:
+        raise AssetFileLockError(f"Invalid asset id, unable to get the lock file {file_name}")
+
+    # The lock file is shared by the actions and the REST handler, which may run as different users of the same group
+    try:
+        lock_fd = os.open(lock_file_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, consts.STATE_FILE_MODE)
+    except OSError as e:
+        raise AssetFileLockError(f"Unable to open the lock file {file_name}: {e!s}") from e
+    if os.fstat(lock_fd).st_uid == os.geteuid():
+        # The umask of the process may have removed the group write permission
+        os.fchmod(lock_fd, consts.STATE_FILE_MODE)
+
+    with os.fdopen(lock_fd, "a") as lock_file:
+        if timeout is None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            deadline = time.time() + timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.time() >= deadline:
+                        raise AssetFileLockError(f"Timed out waiting for the lock file {file_name}") from None
+                    time.sleep(consts.LOCK_POLL_INTERVAL)
+        yield
+
+
 def _load_app_state(asset_id, app_connector=None):
     """This function is used to load the current state file.
 
@@ -102,6 +245,153 @@ def _load_app_state(asset_id, app_connector=None):
     return state
 
 
+def _get_asset_file_path(asset_id, file_name, app_connector=None):
+    """This function is used to get the path of an asset specific file in the app directory.
+
+    :param asset_id: asset_id
+    :param file_name: name of the file, prefixed with the asset_id
+    :param app_connector: Object of app_connector class
+    :return: path: Absolute path of the file or None if the asset_id is invalid
+    """
+
+    asset_id = str(asset_id)
+    if not asset_id or not asset_id.isalnum():
+        debug_print_invalid_asset_id(app_connector)
+        return None
+
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    real_file_path = os.path.abspath(f"{app_dir}/{asset_id}_{file_name}")
+
+    if os.path.dirname(real_file_path) != app_dir:
+        debug_print_invalid_asset_id(app_connector)
+        return None
+
+    return real_file_path
+
+
+def _merge_state_entries(current_entries, saved_entries, entries):
+    """This function is used to merge the entries of a state cache changed by an action into the saved cache.
+
+    :param current_entries: entries of the cache in the state file, saved by any action
+    :param saved_entries: entries of the cache when the action loaded the state
+    :param entries: entries of the cache at the end of the action
+    :return: merged entries: the current entries with the entries added, changed or removed by the action
+    """
+
+    merged_entries = dict(current_entries) if isinstance(current_entries, dict) else {}
+    saved_entries = saved_entries if isinstance(saved_entries, dict) else {}
+
+    for key in entries.keys() | saved_entries.keys():
+        if key not in entries:
+            merged_entries.pop(key, None)
+        elif entries[key] != saved_entries.get(key):
+            merged_entries[key] = entries[key]
+
+    return merged_entries
+
+
+def _get_request_body_size(body):
+    """This function is used to get the number of bytes of a prepared request body.
+
+    :param body: body of the prepared request
+    :return: size: number of bytes, 0 for a missing or streamed body
+    """
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode())
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+def _get_metrics_endpoint(path):
+    """This function is used to get the endpoint label of a request path.
+    The ids and work item types are replaced by placeholders so the number of label values stays bounded.
+
+    :param path: path of the request URL
+    :return: endpoint: path from the API root, e.g. /_apis/wit/workitems/{id}
+    """
+
+    segments = [segment for segment in path.lower().split("/") if segment]
+    for root in consts.METRICS_ENDPOINT_ROOTS:
+        if root in segments:
+            segments = segments[segments.index(root) :]
+            break
+
+    for index, segment in enumerate(segments):
+        if re.match(consts.METRICS_ID_PATTERN, segment):
+            segments[index] = "{id}"
+        elif segment.startswith("$"):
+            segments[index] = "{type}"
+
+    return "/" + "/".join(segments)
+
+
+def _update_metric(metrics, name, labels, value=1):
+    """This function is used to add a value to a counter, set a gauge or observe a value in a histogram.
+
+    :param metrics: dictionary of the metric names to their values by label set
+    :param name: name of the metric, a key of METRICS_DESCRIPTIONS
+    :param labels: dictionary of the labels
+    :param value: value added, set or observed
+    """
+
+    metric_type = consts.METRICS_DESCRIPTIONS[name][0]
+    samples = metrics.setdefault(name, {})
+    # The label sets are kept as JSON keys, sorted so the same labels always give the same key
+    labels_key = json.dumps(sorted(labels.items()))
+
+    if metric_type == consts.METRICS_HISTOGRAM:
+        histogram = samples.setdefault(labels_key, {"buckets": [0] * len(consts.METRICS_DURATION_BUCKETS), "sum": 0, "count": 0})
+        for index, bound in enumerate(consts.METRICS_DURATION_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][index] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+    elif metric_type == consts.METRICS_GAUGE:
+        samples[labels_key] = value
+    else:
+        samples[labels_key] = samples.get(labels_key, 0) + value
+
+
+def _render_metrics(metrics):
+    """This function is used to render the metrics in the Prometheus text format read by the node_exporter textfile collector.
+
+    :param metrics: dictionary of the metric names to their values by label set
+    :return: text of the metrics file
+    """
+
+    def format_labels(labels):
+        label_values = ",".join(
+            '{}="{}"'.format(label, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for label, value in labels
+        )
+        return f"{{{label_values}}}" if label_values else ""
+
+    lines = []
+    for name, (metric_type, description) in consts.METRICS_DESCRIPTIONS.items():
+        samples = metrics.get(name)
+        if not samples:
+            continue
+
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels_key, value in sorted(samples.items()):
+            labels = [tuple(label) for label in json.loads(labels_key)]
+            if metric_type != consts.METRICS_HISTOGRAM:
+                lines.append(f"{name}{format_labels(labels)} {value}")
+                continue
+
+            for bound, bucket_count in zip(consts.METRICS_DURATION_BUCKETS, value["buckets"]):
+                lines.append(f"{name}_bucket{format_labels([*labels, ('le', float(bound))])} {bucket_count}")
+            lines.append(f"{name}_bucket{format_labels([*labels, ('le', '+Inf')])} {value['count']}")
+            lines.append(f"{name}_sum{format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{format_labels(labels)} {value['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
 def debug_print_invalid_asset_id(app_connector):
     if app_connector:
         app_connector.debug_print("Invalid asset_id")
@@ -128,6 +418,8 @@ def _handle_login_redirect(request, key):
     :return: response authorization_url/admin_consent_url
     """
 
+    from django.http import HttpResponseBadRequest, HttpResponseRedirect
+
     asset_id = request.GET.get("asset_id")
     if not asset_id:
         return HttpResponseBadRequest(  # nosemgrep
@@ -156,6 +448,8 @@ def _handle_login_response(request):
     :return: HttpResponse. The response displayed on authorization URL page
     """
 
+    from django.http import HttpResponse, HttpResponseBadRequest
+
     asset_id = request.GET.get("state")
     if not asset_id:
         return HttpResponseBadRequest(  # nosemgrep
@@ -186,18 +480,25 @@ def _handle_login_response(request):
             content_type=consts.TEXT_PLAIN,
         )
 
-    state = _load_app_state(asset_id)
     try:
-        state["code"] = AzureDevopsConnector().encrypt_state(code)
-        state["is_encrypted"] = True
-    except Exception as e:
+        with _asset_file_lock(asset_id, consts.STATE_LOCK_FILE):
+            state = _load_app_state(asset_id)
+            try:
+                state["code"] = AzureDevopsConnector().encrypt_state(code)
+                state["is_encrypted"] = True
+            except Exception as e:
+                return HttpResponseBadRequest(
+                    f"{consts.AZURE_DEVOPS_DECRYPTION_ERROR}: {e!s}",
+                    content_type=consts.TEXT_PLAIN,
+                )
+
+            _save_app_state(state, asset_id, None)
+    except AssetFileLockError as e:
         return HttpResponseBadRequest(
-            f"{consts.AZURE_DEVOPS_DECRYPTION_ERROR}: {e!s}",
+            f"{consts.AZURE_DEVOPS_STATE_LOCK_ERROR}: {e!s}",
             content_type=consts.TEXT_PLAIN,
         )
 
-    _save_app_state(state, asset_id, None)
-
     return HttpResponse(  # nosemgrep
         "Code received. Please close this window, the action will continue to get new token.",
         content_type=consts.TEXT_PLAIN,
@@ -212,6 +513,9 @@ def _handle_rest_request(request, path_parts):
     :return: dictionary containing response parameters
     """
 
+    # Django is only used by the REST handler, it is imported here to keep it out of the startup of every action
+    from django.http import HttpResponseBadRequest, HttpResponseNotFound
+
     if len(path_parts) < 2:
         return HttpResponseBadRequest(
             "error: True, message: Invalid REST endpoint request",
@@ -244,7 +548,12 @@ def _handle_rest_request(request, path_parts):
                     content_type=consts.TEXT_PLAIN,
                 )
 
-            open(auth_status_file_path, "w").close()
+            # The status file wakes up the test connectivity action, an authorization error is written in it.
+            # It is renamed into place, so the action never reads it before the error is written.
+            authorization_error = ""
+            if return_val.status_code != 200:
+                authorization_error = return_val.content.decode("utf-8", errors="replace")
+            _write_file_atomically(auth_status_file_path, authorization_error)
 
             try:
                 change_file_mode_and_permission(auth_status_file_path)
@@ -277,6 +586,8 @@ class AzureDevopsConnector(BaseConnector):
         super().__init__()
 
         self._state = None
+        # State as last loaded or saved, used to detect the changes made by the action
+        self._saved_state = None
         self._client_id = None
         self._client_secret = None
         self._access_token = None
@@ -285,6 +596,59 @@ class AzureDevopsConnector(BaseConnector):
         self._base_url = None
         self._auth_type = None
         self._tenant_id = None
+        self._session = None
+        self._token_expiry_skew = consts.AZURE_DEVOPS_DEFAULT_TOKEN_EXPIRY_SKEW
+        self._project_cache_ttl = consts.AZURE_DEVOPS_DEFAULT_PROJECT_CACHE_TTL
+        self._iteration_cache_ttl = consts.AZURE_DEVOPS_DEFAULT_ITERATION_CACHE_TTL
+        # REST calls can be made from worker threads, the details of the last response are kept per thread
+        self._thread_state = threading.local()
+        self._token_lock = threading.RLock()
+        self._retry_lock = threading.Lock()
+        self._max_retry_wait = consts.AZURE_DEVOPS_DEFAULT_MAX_RETRY_WAIT
+        self._retry_wait_total = 0
+        self._rate_limit = {}
+        self._request_rate = consts.AZURE_DEVOPS_DEFAULT_RATE_LIMIT
+        # Hosts of the Azure DevOps requests, the only requests counted by the rate limit
+        self._rate_limited_hosts = set()
+        # Change of the shared request rate applied with the next token, see _adapt_request_rate
+        self._rate_adjustment = None
+        self._debug_capture = consts.DEBUG_CAPTURE_ON_FAILURE
+        self._debug_max_bytes = consts.AZURE_DEVOPS_DEFAULT_DEBUG_MAX_BYTES
+        self._work_item_cache = False
+        self._work_item_cache_ttl = consts.WORK_ITEM_CACHE_DEFAULT_TTL
+        self._work_item_cache_max_items = consts.WORK_ITEM_CACHE_DEFAULT_MAX_ITEMS
+        # Connection to the work item cache database, opened on the first use and closed in finalize
+        self._work_item_cache_connection = None
+        # Requests made while handling the current parameter, recorded when the request_stats setting is enabled
+        self._request_stats = False
+        self._request_trace = []
+        self._token_refreshes = 0
+        self._request_trace_lock = threading.Lock()
+        # Requests, token refreshes and actions of the run, added to the metrics of the asset in finalize
+        self._metrics_enabled = False
+        self._metrics_requests = []
+        self._metrics_token_refreshes = 0
+        self._metrics_actions = []
+        self._profile_mode = consts.PROFILE_MODE_OFF
+        self._profile_actions = []
+
+    @property
+    def _last_status_code(self):
+        """Status code of the last response received by the current thread."""
+        return getattr(self._thread_state, "last_status_code", None)
+
+    @_last_status_code.setter
+    def _last_status_code(self, status_code):
+        self._thread_state.last_status_code = status_code
+
+    @property
+    def _last_response_headers(self):
+        """Headers of the last response received by the current thread."""
+        return getattr(self._thread_state, "last_response_headers", {})
+
+    @_last_response_headers.setter
+    def _last_response_headers(self, headers):
+        self._thread_state.last_response_headers = headers
 
     def encrypt_state(self, encrypt_var):
         """Handle encryption of token.
@@ -326,6 +690,9 @@ class AzureDevopsConnector(BaseConnector):
         status_code = response.status_code
 
         try:
+            # BeautifulSoup is only used for HTML responses, it is imported here to keep it out of the startup of every action
+            from bs4 import BeautifulSoup
+
             soup = BeautifulSoup(response.text, "html.parser")
             error_text = soup.text
             for element in soup(["script", "style", "footer", "nav"]):
@@ -363,13 +730,37 @@ class AzureDevopsConnector(BaseConnector):
 
         return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
 
+    def _add_response_debug_data(self, r, action_result, failed):
+        """Store the response in the debug data, it will get dumped in the logs if the action fails.
+        The body is only captured according to the debug capture setting and is truncated to the configured
+        number of bytes, its length and SHA-256 hash identify the complete body.
+
+        :param r: response object
+        :param action_result: object of ActionResult class
+        :param failed: whether the processing of the response failed
+        """
+        action_result.add_debug_data({"r_status_code": r.status_code})
+
+        if self._debug_capture == consts.DEBUG_CAPTURE_NEVER or (self._debug_capture == consts.DEBUG_CAPTURE_ON_FAILURE and not failed):
+            return
+
+        content = r.content or b""
+        action_result.add_debug_data({"r_text": content[: self._debug_max_bytes].decode(r.encoding or "utf-8", errors="replace")})
+        action_result.add_debug_data({"r_text_length": len(content)})
+        action_result.add_debug_data({"r_text_sha256": hashlib.sha256(content).hexdigest()})
+        action_result.add_debug_data({"r_headers": dict(r.headers)})
+
     def _process_response(self, r, action_result):
-        # store the r_text in debug data, it will get dumped in the logs if the action fails
+        ret_val, response = self._parse_response(r, action_result)
+
         if hasattr(action_result, "add_debug_data"):
-            action_result.add_debug_data({"r_status_code": r.status_code})
-            action_result.add_debug_data({"r_text": r.text})
-            action_result.add_debug_data({"r_headers": r.headers})
+            # The sign-in page returned for a bad token is a failure even when it can be parsed
+            failed = phantom.is_fail(ret_val) or r.status_code in consts.BAD_TOKEN_STATUS_CODES
+            self._add_response_debug_data(r, action_result, failed)
 
+        return RetVal(ret_val, response)
+
+    def _parse_response(self, r, action_result):
         # Process each 'Content-Type' of response separately
 
         # Process a json response
@@ -439,7 +830,7 @@ class AzureDevopsConnector(BaseConnector):
             data.update({"grant_type": consts.JWT_BEARER_TOKEN, "assertion": code})
 
         req_url = consts.TOKEN_URL
-        headers = {"Content-Type": consts.FORM_URLENCODED}
+        headers = {"Content-Type": consts.FORM_URLENCODED, "Authorization": None}
 
         ret_val, resp_json = self._make_rest_call(
             req_url,
@@ -492,7 +883,7 @@ class AzureDevopsConnector(BaseConnector):
             )
 
         req_url = consts.ENTRA_ID_TOKEN_URL.format(tenant_id=self._tenant_id)
-        headers = {"Content-Type": consts.FORM_URLENCODED}
+        headers = {"Content-Type": consts.FORM_URLENCODED, "Authorization": None}
 
         ret_val, resp_json = self._make_rest_call(
             req_url,
@@ -519,21 +910,161 @@ class AzureDevopsConnector(BaseConnector):
         """
         self._access_token = resp_json[consts.AZURE_DEVOPS_ACCESS_TOKEN_STRING]
         self._refresh_token = resp_json.get(consts.AZURE_DEVOPS_REFRESH_TOKEN_STRING)
+
+        # expires_in is relative to the time of issue, store the absolute expiry so later actions can refresh ahead of it
+        try:
+            resp_json[consts.AZURE_DEVOPS_EXPIRES_ON_STRING] = int(time.time()) + int(resp_json[consts.AZURE_DEVOPS_EXPIRES_IN_STRING])
+        except (KeyError, TypeError, ValueError):
+            self.debug_print("Token response does not contain a valid expires_in value")
+
         self._state[consts.AZURE_DEVOPS_TOKEN_STRING] = resp_json
+        self._set_session_token()
 
-    def _get_request_headers(self):
-        """Utility method that returns request headers.
-        NOTE: always call this method after _get_token() method
+    def _is_token_expiring(self, token=None):
+        """Check whether the stored access token expires within the configured skew.
+
+        Args:
+            token (dict): token data to check, the token of the state if not given
 
         Returns:
-            dict: request headers with access token
+            bool: True if the token has expired or is about to expire, else False
         """
+        if token is None:
+            token = self._state.get(consts.AZURE_DEVOPS_TOKEN_STRING, {})
 
-        return {
-            "Authorization": f"Bearer {self._access_token}",
-            "Accept": "*/*",
-            "Content-Type": consts.APPLICATION_JSON,
-        }
+        expires_on = token.get(consts.AZURE_DEVOPS_EXPIRES_ON_STRING)
+        if not expires_on:
+            # Tokens saved before the expiry was tracked rely on the reactive refresh
+            return False
+
+        try:
+            return time.time() + self._token_expiry_skew >= float(expires_on)
+        except (TypeError, ValueError):
+            return False
+
+    def _get_token_single_flight(self, action_result, access_token):
+        """Get a new token, unless another action of the asset already replaced the given access token.
+
+        The token requests of the asset are serialized by a lock file. An action waiting for the lock uses the
+        token saved by the action holding it, so concurrent actions do not each redeem the same refresh token.
+        The token is never requested without the lock: an action timing out on it uses the token saved in the
+        meantime, or fails.
+
+        Args:
+            action_result (ActionResult): object of ActionResult class
+            access_token (str): access token to replace
+
+        Returns:
+            status: phantom.APP_SUCCESS/phantom.APP_ERROR
+        """
+        try:
+            with _asset_file_lock(self.get_asset_id(), consts.TOKEN_LOCK_FILE, self, timeout=consts.TOKEN_LOCK_TIMEOUT):
+                if self._load_saved_token(access_token):
+                    self.debug_print("Using the token saved by another action")
+                    return phantom.APP_SUCCESS
+
+                with self._request_trace_lock:
+                    self._token_refreshes += 1
+
+                ret_val = self._get_token(action_result)
+                if phantom.is_fail(ret_val):
+                    return action_result.get_status()
+
+                # Save the new token before releasing the lock so the waiting actions can use it
+                if phantom.is_fail(self._save_state()):
+                    return action_result.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_TOKEN_SAVE_ERROR)
+        except AssetFileLockError as e:
+            # The action holding the lock may have saved its token since, it is used rather than refreshing without the lock
+            if self._load_saved_token(access_token):
+                self.debug_print("Using the token saved by another action")
+                return phantom.APP_SUCCESS
+
+            return action_result.set_status(
+                phantom.APP_ERROR, f"{consts.AZURE_DEVOPS_TOKEN_LOCK_ERROR}: {self._get_error_message_from_exception(e)}"
+            )
+
+        return phantom.APP_SUCCESS
+
+    def _load_saved_token(self, access_token):
+        """Use the token saved in the state file if it replaced the given access token and is not expiring.
+
+        Args:
+            access_token (str): access token to replace
+
+        Returns:
+            bool: True if the saved token is used, else False
+        """
+        state = _load_app_state(self.get_asset_id(), self)
+        token = state.get(consts.AZURE_DEVOPS_TOKEN_STRING) or {}
+
+        saved_access_token = token.get(consts.AZURE_DEVOPS_ACCESS_TOKEN_STRING)
+        saved_refresh_token = token.get(consts.AZURE_DEVOPS_REFRESH_TOKEN_STRING)
+        if not saved_access_token:
+            return False
+
+        if state.get(consts.AZURE_DEVOPS_STATE_IS_ENCRYPTED):
+            try:
+                saved_access_token = encryption_helper.decrypt(saved_access_token, self._asset_id)
+                if saved_refresh_token:
+                    saved_refresh_token = encryption_helper.decrypt(saved_refresh_token, self._asset_id)
+            except Exception as e:
+                self.debug_print(f"{consts.AZURE_DEVOPS_DECRYPTION_ERROR}: {self._get_error_message_from_exception(e)}")
+                return False
+
+        if saved_access_token == access_token or self._is_token_expiring(token):
+            return False
+
+        self._access_token = saved_access_token
+        # A token saved without a refresh token must not drop the refresh token of this action
+        if saved_refresh_token:
+            self._refresh_token = saved_refresh_token
+
+        # The saved token is already in the state file, it does not make the state of this action changed
+        self._state[consts.AZURE_DEVOPS_TOKEN_STRING] = token
+        if self._saved_state is not None:
+            self._saved_state[consts.AZURE_DEVOPS_TOKEN_STRING] = copy.deepcopy(token)
+
+        self._set_session_token()
+        return True
+
+    def _create_session(self):
+        """Create the connector-owned HTTP session.
+        Connections to dev.azure.com, vsaex.dev.azure.com and the token endpoints are kept alive
+        and reused for every call made during the action run.
+
+        Returns:
+            requests.Session: session with pooled adapters and default request headers
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=consts.AZURE_DEVOPS_POOL_CONNECTIONS,
+            pool_maxsize=consts.AZURE_DEVOPS_POOL_MAXSIZE,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(
+            {
+                "Accept": "*/*",
+                "Content-Type": consts.APPLICATION_JSON,
+            }
+        )
+
+        if self._auth_type == consts.AUTH_TYPE_BASIC and self._username and self._password:
+            session.auth = (self._username, self._password)  # basic authentication
+
+        return session
+
+    def _set_session_token(self):
+        """Utility method that sets the bearer token on the session.
+        NOTE: call this method whenever the access token changes
+        """
+        if self._session is None or self._auth_type == consts.AUTH_TYPE_BASIC:
+            return
+
+        if self._access_token:
+            self._session.headers["Authorization"] = f"Bearer {self._access_token}"
+        else:
+            self._session.headers.pop("Authorization", None)
 
     def _make_rest_call_helper(
         self,
@@ -557,18 +1088,19 @@ class AzureDevopsConnector(BaseConnector):
         """
 
         if not self._password:
-            token = self._state.get("token", {})
-            if consts.AZURE_DEVOPS_ACCESS_TOKEN_STRING not in token:
-                ret_val = self._get_token(action_result)
+            with self._token_lock:
+                token = self._state.get("token", {})
+                if consts.AZURE_DEVOPS_ACCESS_TOKEN_STRING not in token or self._is_token_expiring():
+                    ret_val = self._get_token_single_flight(action_result, self._access_token)
 
-                if phantom.is_fail(ret_val):
-                    return action_result.get_status(), None
-        headers = self._get_request_headers()
+                    if phantom.is_fail(ret_val):
+                        return action_result.get_status(), None
+
+        access_token = self._access_token
+        # the session carries the authorization and default headers, only per-request headers are sent here
+        headers = dict(kwargs.get("headers") or {})
         params = {"api-version": self._api_version}
         skip_base_url = kwargs.get("skip_base_url", False)
-        # if headers are already present, add them to headers dict
-        if kwargs.get("headers"):
-            headers.update(**kwargs.get("headers"))
 
         # if params are already present, add them to params dict
         if kwargs.get("params"):
@@ -584,12 +1116,16 @@ class AzureDevopsConnector(BaseConnector):
             data=data,
             json=json,
             skip_base_url=skip_base_url,
+            retry=kwargs.get("retry"),
         )
 
-        if consts.BAD_TOKEN_MATCH_STRING in action_result.get_message():
+        # Fallback for tokens revoked or expired before their recorded expiry
+        if not self._password and self._last_status_code in consts.BAD_TOKEN_STATUS_CODES:
             self.save_progress("bad token")
-            self._get_token(action_result=action_result)
-            headers.update({"Authorization": f"Bearer {self._access_token}"})
+            with self._token_lock:
+                # Another thread may already have replaced the token the request was sent with
+                if self._access_token == access_token:
+                    self._get_token_single_flight(action_result, access_token)
             ret_val, resp_json = self._make_rest_call(
                 endpoint,
                 action_result,
@@ -600,6 +1136,7 @@ class AzureDevopsConnector(BaseConnector):
                 data=data,
                 json=json,
                 skip_base_url=skip_base_url,
+                retry=kwargs.get("retry"),
             )
 
         if phantom.is_fail(ret_val):
@@ -609,12 +1146,21 @@ class AzureDevopsConnector(BaseConnector):
 
     def _make_rest_call(self, endpoint, action_result, method="get", api_version=None, **kwargs):
         # **kwargs can be any additional parameters that requests.request accepts
+        # retry=True marks a non-idempotent request (e.g. a read-only POST) as safe to send again
 
         skip_base_url = kwargs.pop("skip_base_url", False)
+        retry = kwargs.pop("retry", None)
+        if retry is None:
+            retry = method.lower() in consts.AZURE_DEVOPS_IDEMPOTENT_METHODS
         action_id = self.get_action_identifier()
+        self._last_status_code = None
+        self._last_response_headers = {}
+
+        if self._session is None:
+            self._session = self._create_session()
 
         try:
-            request_func = getattr(requests, method)
+            request_func = getattr(self._session, method)
         except AttributeError:
             return RetVal(
                 action_result.set_status(phantom.APP_ERROR, f"Invalid method: {method}"),
@@ -635,34 +1181,298 @@ class AzureDevopsConnector(BaseConnector):
         if api_version:
             kwargs["params"].update({"api-version": api_version})
 
-        try:
-            if self._auth_type == "Basic Auth":
-                if not self._username or not self._password:
-                    self.save_progress("Please provide username and access token for Basic Auth")
-                    return phantom.APP_ERROR, None
+        # basic auth credentials and the bearer token are carried by the session
+        if self._auth_type == "Basic Auth":
+            if not self._username or not self._password:
+                self.save_progress("Please provide username and access token for Basic Auth")
+                return phantom.APP_ERROR, None
+        elif not self._client_id or not self._client_secret:
+            self.save_progress("Please provide Client ID or Client Secret for Interactive Auth")
+            return phantom.APP_ERROR, None
+
+        attempt = 0
+        request_stats = {"start": time.perf_counter(), "request_bytes": 0, "response_bytes": 0, "throttled": 0}
+        while True:
+            self._wait_for_rate_limit(url)
+            try:
                 r = request_func(
                     url,
-                    auth=(self._username, self._password),  # basic authentication
                     **kwargs,
                 )
+            except Exception as e:
+                # A request that may have reached the server is only sent again when it is safe to repeat
+                delay = self._get_retry_delay(attempt) if retry and isinstance(e, requests.exceptions.ConnectionError) else None
+                if delay is None:
+                    self._record_request(method, url, None, attempt, request_stats)
+                    return RetVal(
+                        action_result.set_status(
+                            phantom.APP_ERROR,
+                            f"Error Connecting to server. Details: {e!s}",
+                        ),
+                        None,
+                    )
+                self.save_progress(f"Error connecting to server, retrying in {delay:.1f} seconds")
             else:
-                if not self._client_id or not self._client_secret:
-                    self.save_progress("Please provide Client ID or Client Secret for Interactive Auth")
-                    return phantom.APP_ERROR, None
-                r = request_func(
-                    url,
-                    **kwargs,
-                )
-        except Exception as e:
-            return RetVal(
-                action_result.set_status(
-                    phantom.APP_ERROR,
-                    f"Error Connecting to server. Details: {e!s}",
-                ),
-                None,
-            )
+                self._update_rate_limit(r)
+                self._adapt_request_rate(r)
+                if self._request_stats or self._metrics_enabled:
+                    request_stats["request_bytes"] += _get_request_body_size(r.request.body)
+                    request_stats["response_bytes"] += len(r.content or b"")
+                    if r.status_code == 429:
+                        request_stats["throttled"] += 1
+
+                # A 429 is rejected before being processed, so it can be retried for any method
+                if r.status_code not in consts.AZURE_DEVOPS_RETRY_STATUS_CODES or not (retry or r.status_code == 429):
+                    break
+
+                delay = self._get_retry_delay(attempt, r.headers)
+                if delay is None:
+                    break
+                self.save_progress(f"Received status code {r.status_code}, retrying in {delay:.1f} seconds")
+
+            time.sleep(delay)
+            attempt += 1
+
+        self._last_status_code = r.status_code
+        self._last_response_headers = r.headers
+        self._record_request(method, url, r.status_code, attempt, request_stats)
         return self._process_response(r, action_result)
 
+    def _record_request(self, method, url, status_code, retries, request_stats):
+        """Add a request to the trace of the current parameter, when the request_stats setting is enabled.
+
+        :param method: HTTP method of the request
+        :param url: URL of the request, without the query parameters
+        :param status_code: status code of the last response, None if the server could not be reached
+        :param retries: number of times the request was sent again
+        :param request_stats: dictionary of the start time, the bytes sent and received and the 429 responses of all the attempts
+        """
+        if not (self._request_stats or self._metrics_enabled):
+            return
+
+        parsed_url = urlparse.urlsplit(url)
+        entry = {
+            "method": method.upper(),
+            "host": parsed_url.hostname,
+            "path": parsed_url.path,
+            "status_code": status_code,
+            "elapsed_ms": round((time.perf_counter() - request_stats["start"]) * 1000, 1),
+            "request_bytes": request_stats["request_bytes"],
+            "response_bytes": request_stats["response_bytes"],
+            "retries": retries,
+            "throttled": request_stats["throttled"],
+        }
+        with self._request_trace_lock:
+            self._request_trace.append(entry)
+
+    def _get_request_summary(self):
+        """Aggregate the requests recorded for the current parameter.
+
+        :return: dictionary of the request counts, time and bytes
+        """
+        with self._request_trace_lock:
+            trace = list(self._request_trace)
+            token_refreshes = self._token_refreshes
+
+        status_codes = {}
+        for entry in trace:
+            status_code = str(entry["status_code"] or "error")
+            status_codes[status_code] = status_codes.get(status_code, 0) + 1
+
+        return {
+            "count": len(trace),
+            "retries": sum(entry["retries"] for entry in trace),
+            "throttled": sum(entry["throttled"] for entry in trace),
+            "token_refreshes": token_refreshes,
+            "elapsed_ms": round(sum(entry["elapsed_ms"] for entry in trace), 1),
+            "request_bytes": sum(entry["request_bytes"] for entry in trace),
+            "response_bytes": sum(entry["response_bytes"] for entry in trace),
+            "status_codes": status_codes,
+        }
+
+    def _get_retry_delay(self, attempt, headers=None):
+        """Get the time to wait before the next attempt of a request.
+        The delay asked for by the server is honored, from the Retry-After header, else the X-RateLimit-Delay header,
+        else the X-RateLimit-Reset time. Otherwise an exponential backoff with full jitter is used. A single delay
+        is capped at the max_retry_wait setting.
+
+        :param attempt: number of retries already made for the request
+        :param headers: headers of the failed response
+        :return: delay in seconds, None if the request should not be retried
+        """
+        if attempt >= consts.AZURE_DEVOPS_MAX_RETRIES or not self._max_retry_wait:
+            return None
+
+        headers = headers or {}
+        delay = self._parse_retry_after(headers.get("Retry-After"))
+        if delay is None:
+            delay = self._parse_seconds(headers.get("X-RateLimit-Delay"))
+        if delay is None:
+            # X-RateLimit-Reset is the Unix time at which the usage of the resource is reset
+            reset = self._parse_seconds(headers.get("X-RateLimit-Reset"))
+            if reset is not None:
+                delay = max(0.0, reset - time.time())
+        if delay is None:
+            delay = random.uniform(0, min(consts.AZURE_DEVOPS_RETRY_BACKOFF_MAX, consts.AZURE_DEVOPS_RETRY_BACKOFF_BASE * 2**attempt))
+        delay = min(delay, self._max_retry_wait)
+
+        # The waiting time is shared by all the requests of the action
+        with self._retry_lock:
+            if self._retry_wait_total + delay > self._max_retry_wait:
+                self.debug_print(f"Not retrying, the retry wait budget of {self._max_retry_wait} seconds would be exceeded")
+                return None
+            self._retry_wait_total += delay
+
+        return delay
+
+    def _parse_seconds(self, value):
+        """Parse a header value holding a number of seconds.
+
+        :param value: header value
+        :return: non-negative number of seconds, None if the value is missing or invalid
+        """
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return None
+
+    def _parse_retry_after(self, retry_after):
+        """Parse the value of a Retry-After header.
+
+        :param retry_after: number of seconds or HTTP date
+        :return: delay in seconds, None if the value is missing or invalid
+        """
+        if not retry_after:
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except Exception:
+            return None
+
+    def _update_rate_limit(self, response):
+        """Record the throttling headers returned by the service.
+
+        :param response: response object
+        """
+        rate_limit = {header: response.headers[header] for header in consts.AZURE_DEVOPS_RATE_LIMIT_HEADERS if header in response.headers}
+        if not rate_limit:
+            return
+
+        self._rate_limit = rate_limit
+        self.debug_print("Rate limit headers received: ", rate_limit)
+
+    def _wait_for_rate_limit(self, url):
+        """Take a token from the request bucket shared by all the actions of the asset, waiting for one if the bucket is empty.
+        Only the requests sent to Azure DevOps are limited, the token and platform requests are not.
+
+        :param url: URL of the request
+        """
+        if not self._request_rate or urlparse.urlsplit(url).hostname not in self._rate_limited_hosts:
+            return
+
+        wait = self._update_rate_limit_bucket(take_token=True)
+        if wait > 0:
+            self.debug_print(f"Rate limit reached, waiting {wait:.2f} seconds")
+            time.sleep(wait)
+
+    def _adapt_request_rate(self, response):
+        """Adapt the shared request rate to the throttling state reported by the service.
+        The rate follows the remaining budget from the X-RateLimit headers, is halved on a 429 and recovers
+        gradually towards the configured rate otherwise. The change is applied to the rate stored in the bucket:
+        at once for a 429, with the token of the next request otherwise, so a request only locks the bucket once.
+
+        :param response: response object
+        """
+        if not self._request_rate or urlparse.urlsplit(response.url or "").hostname not in self._rate_limited_hosts:
+            return
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        limit = response.headers.get("X-RateLimit-Limit")
+
+        try:
+            if remaining is not None and limit:
+                factor = float(remaining) / float(limit)
+                self._rate_adjustment = lambda rate: self._request_rate * factor
+            elif response.status_code == 429:
+                self._rate_adjustment = lambda rate: rate / 2
+            else:
+                self._rate_adjustment = lambda rate: rate + self._request_rate * consts.AZURE_DEVOPS_RATE_LIMIT_RECOVERY_STEP
+        except (TypeError, ValueError, ZeroDivisionError):
+            return
+
+        if response.status_code == 429:
+            self._update_rate_limit_bucket(take_token=False)
+
+    def _update_rate_limit_bucket(self, take_token):
+        """Apply the pending rate change to the request bucket and take a token from it, under the lock of the bucket file.
+
+        :param take_token: take a token for a request
+        :return: seconds to wait before sending the request
+        """
+        bucket_file_path = _get_asset_file_path(self.get_asset_id(), consts.RATE_LIMIT_FILE, self)
+        if not bucket_file_path:
+            return 0
+
+        capacity = max(1.0, self._request_rate * consts.AZURE_DEVOPS_RATE_LIMIT_BURST_SECONDS)
+        adjust_rate, self._rate_adjustment = self._rate_adjustment, None
+        wait = 0
+
+        try:
+            with open(bucket_file_path, "a+") as bucket_file:
+                fcntl.flock(bucket_file, fcntl.LOCK_EX)
+                bucket = self._read_rate_limit_bucket(bucket_file)
+
+                now = time.time()
+                stored_rate = min(float(bucket.get("rate", self._request_rate)), self._request_rate)
+                tokens = min(capacity, float(bucket.get("tokens", capacity)) + (now - float(bucket.get("updated", now))) * stored_rate)
+
+                # The change is computed from the rate stored by all the actions, not from the one this action last saw
+                rate = stored_rate
+                if adjust_rate:
+                    rate = min(self._request_rate, max(self._request_rate * consts.AZURE_DEVOPS_RATE_LIMIT_MIN_FACTOR, adjust_rate(stored_rate)))
+
+                if take_token:
+                    # The token is reserved even when the bucket is empty so the waiting actions are served in order
+                    tokens -= 1
+                    wait = -tokens / rate if tokens < 0 else 0
+
+                if take_token or rate != stored_rate:
+                    self._write_rate_limit_bucket(bucket_file, {"tokens": tokens, "updated": now, "rate": rate})
+        except Exception as e:
+            self.debug_print(f"Unable to use the rate limit file: {e!s}")
+            return 0
+
+        return wait
+
+    def _read_rate_limit_bucket(self, bucket_file):
+        """Read the request bucket from the locked rate limit file.
+
+        :param bucket_file: rate limit file object
+        :return: dictionary with the tokens, last update time and rate of the bucket
+        """
+        bucket_file.seek(0)
+        try:
+            return json.loads(bucket_file.read() or "{}")
+        except ValueError:
+            return {}
+
+    def _write_rate_limit_bucket(self, bucket_file, bucket):
+        """Write the request bucket to the locked rate limit file.
+
+        :param bucket_file: rate limit file object
+        :param bucket: dictionary with the tokens, last update time and rate of the bucket
+        """
+        bucket_file.seek(0)
+        bucket_file.truncate()
+        bucket_file.write(json.dumps(bucket))
+        bucket_file.flush()
+
     def _get_asset_name(self, action_result):
         """Get name of the asset using Phantom URL.
         :param action_result: object of ActionResult class
@@ -672,7 +1482,13 @@ class AzureDevopsConnector(BaseConnector):
         asset_id = self.get_asset_id()
         rest_endpoint = consts.AZURE_DEVOPS_PHANTOM_ASSET_INFO_URL.format(asset_id=asset_id)
         url = f"{consts.AZURE_DEVOPS_PHANTOM_BASE_URL.format(phantom_base_url=self._get_phantom_base_url())}{rest_endpoint}"
-        ret_val, resp_json = self._make_rest_call(endpoint=url, action_result=action_result, verify=False, skip_base_url=True)  # nosemgrep
+        ret_val, resp_json = self._make_rest_call(
+            endpoint=url,
+            action_result=action_result,
+            verify=False,  # nosemgrep
+            headers={"Authorization": None},
+            skip_base_url=True,
+        )
 
         if phantom.is_fail(ret_val):
             return ret_val, None
@@ -697,7 +1513,13 @@ class AzureDevopsConnector(BaseConnector):
 
         url = f"{consts.AZURE_DEVOPS_PHANTOM_BASE_URL.format(phantom_base_url=self._get_phantom_base_url())}{consts.AZURE_DEVOPS_PHANTOM_SYS_INFO_URL}"
 
-        ret_val, resp_json = self._make_rest_call(endpoint=url, action_result=action_result, verify=False, skip_base_url=True)  # nosemgrep
+        ret_val, resp_json = self._make_rest_call(
+            endpoint=url,
+            action_result=action_result,
+            verify=False,  # nosemgrep
+            headers={"Authorization": None},
+            skip_base_url=True,
+        )
 
         if phantom.is_fail(ret_val):
             return ret_val, None
@@ -831,26 +1653,39 @@ class AzureDevopsConnector(BaseConnector):
         url_to_show = f"{app_rest_url}/start_oauth?asset_id={self.get_asset_id()}&"
 
         # Save the state, will be used by the request handler
-        _save_app_state(app_state, self.get_asset_id(), self)
+        try:
+            with _asset_file_lock(self.get_asset_id(), consts.STATE_LOCK_FILE, self):
+                _save_app_state(app_state, self.get_asset_id(), self)
+        except AssetFileLockError as e:
+            self.save_progress("Test Connectivity Failed")
+            return action_result.set_status(
+                phantom.APP_ERROR, f"{consts.AZURE_DEVOPS_STATE_LOCK_ERROR}: {self._get_error_message_from_exception(e)}"
+            )
+
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        auth_status_file_path = f"{app_dir}/{self.get_asset_id()}_{consts.TC_FILE}"
+
+        # A status file left by an earlier authorization must not complete this one
+        if os.path.isfile(auth_status_file_path):
+            os.unlink(auth_status_file_path)
 
         self.save_progress("==" * 40)
         self.save_progress("\nPlease connect to the following Url from a different tab to continue the connectivity process...\n")
         self.save_progress(url_to_show)
         self.save_progress("==" * 40)
 
-        time.sleep(5)
-
-        app_dir = os.path.dirname(os.path.abspath(__file__))
-        auth_status_file_path = f"{app_dir}/{self.get_asset_id()}_{consts.TC_FILE}"
-
         self.save_progress("Waiting for authorization to complete...")
 
-        completed = self.check_authorization(auth_status_file_path)
+        completed, authorization_error = self.check_authorization(auth_status_file_path)
 
         if not completed:
             self.save_progress("The authentication process does not seem to be completed, timing out...")
             return action_result.set_status(phantom.APP_ERROR)
 
+        if authorization_error:
+            self.save_progress("Test Connectivity Failed")
+            return action_result.set_status(phantom.APP_ERROR, authorization_error)
+
         # Load the state again, since the http request handlers would have saved the result of the app authorization
         self._state = _load_app_state(self.get_asset_id(), self)
         if not self._state:
@@ -878,21 +1713,30 @@ class AzureDevopsConnector(BaseConnector):
         return action_result.set_status(phantom.APP_SUCCESS)
 
     def check_authorization(self, auth_status_file_path):
-        """method that check for auth file creation
+        """method that waits for the auth file written by the REST handler when the authorization completes
         :param auth_status_file_path (str): auth file path string
-        :return: bool: True if file is found, else False
+        :return: bool, str: True if file is found, else False, and the authorization error written in the file if any
         """
-        completed = False
-        for i in range(0, 40):
-            self.send_progress("{}".format("." * (i % 10)))
+        deadline = time.monotonic() + self._authorization_timeout
 
-            if os.path.isfile(auth_status_file_path):
-                completed = True
-                os.unlink(auth_status_file_path)
-                break
+        with _watch_directory(os.path.dirname(auth_status_file_path), self) as wait_for_file:
+            i = 0
+            while True:
+                if os.path.isfile(auth_status_file_path):
+                    with open(auth_status_file_path) as auth_status_file:
+                        authorization_error = auth_status_file.read()
+                    os.unlink(auth_status_file_path)
+                    return True, authorization_error or None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, None
 
-            time.sleep(consts.AZURE_DEVOPS_TC_STATUS_SLEEP)
-        return completed
+                self.send_progress("{}".format("." * (i % 10)))
+                i += 1
+
+                # Returns as soon as a file of the app directory is written, the progress is updated in between
+                wait_for_file(min(remaining, consts.AZURE_DEVOPS_TC_STATUS_SLEEP))
 
     def _handle_get_work_item(self, param: dict):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
@@ -911,28 +1755,449 @@ class AzureDevopsConnector(BaseConnector):
         if fields:
             params["fields"] = fields
 
-        ret_val, response = self._make_rest_call_helper(
-            f"{consts.WORK_ITEMS}/{work_item_id}",
-            action_result,
-            params=params,
-        )
+        # A work item as of a given time is not tied to its current revision, those requests bypass the cache
+        if self._work_item_cache and not asof:
+            ret_val, response, cache_status = self._get_cached_work_item(action_result, work_item_id, params)
+        else:
+            cache_status = None
+            ret_val, response = self._make_rest_call_helper(
+                f"{consts.WORK_ITEMS}/{work_item_id}",
+                action_result,
+                params=params,
+            )
 
         if phantom.is_fail(ret_val):
             return action_result.get_status()
-        temp_fields = {}
-        for key, val in response.get("fields").items():
-            temp_key = key.replace(".", "-")
-            temp_fields[temp_key] = val
-        response["fields"] = temp_fields
-        action_result.add_data(response)
+
+        action_result.add_data(self._shape_work_item(response, **self._get_work_item_shaping(param)))
 
         summary = action_result.update_summary({})
         summary["status"] = f"Work item {work_item_id} retrieved successfully"
+        if cache_status:
+            summary["cache"] = cache_status
 
         self.debug_print(f"Work item {work_item_id} retrieved successfully")
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _get_cached_work_item(self, action_result, work_item_id, params):
+        """Get a work item from the on-disk cache when its cached revision is current, else from the API.
+
+        A cached work item validated less than the cache TTL ago is served without any request. An older one is
+        served after a request for the System.Rev field only confirms that its revision is still the current one.
+
+        :param action_result: object of ActionResult class
+        :param work_item_id: work item id
+        :param params: request parameters of the work item
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, work item, cache status (hit, revalidated or miss)
+        """
+        endpoint = f"{consts.WORK_ITEMS}/{work_item_id}"
+        # The same work item is cached separately for every expand and fields combination
+        key = (self._organization, self._project, str(work_item_id), json.dumps(params, sort_keys=True))
+
+        cached = self._read_work_item_cache(key)
+        if cached:
+            cached_rev, work_item, validated_at = cached
+
+            if time.time() - validated_at < self._work_item_cache_ttl:
+                self._touch_work_item_cache(key, validated=False)
+                return phantom.APP_SUCCESS, work_item, consts.WORK_ITEM_CACHE_HIT
+
+            ret_val, response = self._make_rest_call_helper(endpoint, action_result, params={"fields": "System.Rev"})
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), None, None
+
+            if response.get("rev") == cached_rev:
+                self._touch_work_item_cache(key, validated=True)
+                return phantom.APP_SUCCESS, work_item, consts.WORK_ITEM_CACHE_REVALIDATED
+
+        ret_val, response = self._make_rest_call_helper(endpoint, action_result, params=params)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None, None
+
+        self._write_work_item_cache(key, response)
+
+        return phantom.APP_SUCCESS, response, consts.WORK_ITEM_CACHE_MISS
+
+    def _get_work_item_cache_connection(self):
+        """Get the connection to the work item cache database, stored next to the asset state.
+        The database is opened and its table created once per action run.
+
+        :return: sqlite3 connection, or None if the database cannot be opened
+        """
+        if self._work_item_cache_connection is not None:
+            return self._work_item_cache_connection
+
+        cache_file_path = _get_asset_file_path(self.get_asset_id(), consts.WORK_ITEM_CACHE_FILE, self)
+        if not cache_file_path:
+            return None
+
+        connection = sqlite3.connect(cache_file_path, timeout=consts.WORK_ITEM_CACHE_LOCK_TIMEOUT)
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS work_items (organization TEXT, project TEXT, id TEXT, request TEXT, "
+                    "rev INTEGER, data TEXT, validated_at REAL, used_at REAL, PRIMARY KEY (organization, project, id, request))"
+                )
+        except sqlite3.Error:
+            connection.close()
+            raise
+
+        self._work_item_cache_connection = connection
+        return connection
+
+    def _execute_work_item_cache(self, query, parameters=()):
+        """Run a query on the work item cache database in its own transaction.
+
+        The cache is an optimization only, any database error is logged and reported as an empty result.
+
+        :param query: SQL query
+        :param parameters: parameters of the query
+        :return: rows returned by the query
+        """
+        try:
+            connection = self._get_work_item_cache_connection()
+            if connection is None:
+                return []
+
+            with connection:
+                return connection.execute(query, parameters).fetchall()
+        except sqlite3.Error as e:
+            self.debug_print(f"Error occurred while accessing the work item cache: {self._get_error_message_from_exception(e)}")
+            return []
+
+    def _close_work_item_cache(self):
+        """Close the connection to the work item cache database, if it was opened."""
+        if self._work_item_cache_connection is not None:
+            self._work_item_cache_connection.close()
+            self._work_item_cache_connection = None
+
+    def _read_work_item_cache(self, key):
+        """Read a work item from the cache.
+
+        :param key: tuple of organization, project, work item id and request parameters
+        :return: tuple of revision, work item and last validation time, or None if the work item is not cached
+        """
+        rows = self._execute_work_item_cache(
+            "SELECT rev, data, validated_at FROM work_items WHERE organization = ? AND project = ? AND id = ? AND request = ?", key
+        )
+        if not rows:
+            return None
+
+        rev, data, validated_at = rows[0]
+        try:
+            work_item = json.loads(encryption_helper.decrypt(data, self.get_asset_id()))
+        except Exception as e:
+            # A work item that cannot be decrypted, e.g. one cached by an older version of the app, is fetched again
+            self.debug_print(f"Ignoring the cached work item, unable to decrypt it: {self._get_error_message_from_exception(e)}")
+            return None
+
+        return rev, work_item, validated_at
+
+    def _touch_work_item_cache(self, key, validated):
+        """Mark a cached work item as used, and as validated if its revision was just checked.
+
+        :param key: tuple of organization, project, work item id and request parameters
+        :param validated: whether the revision of the work item was just checked
+        """
+        now = time.time()
+        if validated:
+            self._execute_work_item_cache(
+                "UPDATE work_items SET used_at = ?, validated_at = ? WHERE organization = ? AND project = ? AND id = ? AND request = ?",
+                (now, now, *key),
+            )
+        else:
+            self._execute_work_item_cache(
+                "UPDATE work_items SET used_at = ? WHERE organization = ? AND project = ? AND id = ? AND request = ?", (now, *key)
+            )
+
+    def _write_work_item_cache(self, key, work_item):
+        """Cache a work item, then evict the least recently used work items above the cache size.
+        The work item is encrypted like the tokens of the asset state, as it may contain sensitive fields.
+
+        :param key: tuple of organization, project, work item id and request parameters
+        :param work_item: work item as returned by the API
+        """
+        try:
+            data = encryption_helper.encrypt(json.dumps(work_item), self.get_asset_id())
+        except Exception as e:
+            self.debug_print(f"Not caching the work item, unable to encrypt it: {self._get_error_message_from_exception(e)}")
+            return
+
+        now = time.time()
+        self._execute_work_item_cache(
+            "INSERT OR REPLACE INTO work_items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (*key, work_item.get("rev"), data, now, now),
+        )
+        self._execute_work_item_cache(
+            "DELETE FROM work_items WHERE rowid IN (SELECT rowid FROM work_items ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self._work_item_cache_max_items,),
+        )
+
+    def _handle_get_work_items(self, param: dict):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        ret_val, work_item_ids = self._parse_work_item_ids(action_result, param["work_item_ids"])
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        expand = param.get("expand", "None")
+        asof = param.get("asof")
+        fields = param.get("fields")
+        shaping = self._get_work_item_shaping(param)
+
+        body = {"$expand": expand}
+        if asof:
+            body["asOf"] = asof
+        if fields:
+            body["fields"] = self._parse_comma_separated_list(fields)
+
+        ret_val, work_items, not_found = self._get_work_items_batched(
+            action_result, work_item_ids, body, consts.WORK_ITEMS_BATCH_DEFAULT_WORKERS
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        for work_item in work_items:
+            action_result.add_data(self._shape_work_item(work_item, **shaping))
+
+        summary = action_result.update_summary({})
+        summary["total_work_items"] = action_result.get_data_size()
+        summary["work_items_not_found"] = not_found
+
+        self.debug_print(f"{action_result.get_data_size()} work item(s) retrieved successfully")
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _handle_query_work_items(self, param: dict):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        query = param["query"]
+        expand = param.get("expand", "None")
+        fields = param.get("fields")
+        shaping = self._get_work_item_shaping(param)
+
+        ret_val, top = self._validate_integer(action_result, param.get("top", consts.WIQL_DEFAULT_TOP), "top")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, max_workers = self._validate_integer(
+            action_result, param.get("max_workers", consts.WORK_ITEMS_BATCH_DEFAULT_WORKERS), "max_workers"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        self.save_progress("Running the WIQL query")
+        ret_val, response = self._make_rest_call_helper(
+            consts.WIQL,
+            action_result,
+            method="post",
+            json={"query": query},
+            params={"$top": top},
+            retry=True,
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Flat queries return work item references, link queries return the relations between them
+        references = response.get("workItems")
+        if references is None:
+            references = [relation.get("target") for relation in response.get("workItemRelations") or []]
+
+        work_item_ids = []
+        seen_ids = set()
+        for reference in references:
+            if reference and reference.get("id") not in seen_ids:
+                seen_ids.add(reference["id"])
+                work_item_ids.append(reference["id"])
+        work_item_ids = work_item_ids[:top]
+
+        summary = action_result.update_summary({})
+        summary["total_work_items"] = 0
+
+        if not work_item_ids:
+            return action_result.set_status(phantom.APP_SUCCESS, "No work items found")
+
+        body = {"$expand": expand}
+        if fields:
+            body["fields"] = self._parse_comma_separated_list(fields)
+
+        self.save_progress(f"Retrieving {len(work_item_ids)} work item(s)")
+        ret_val, work_items, _ = self._get_work_items_batched(action_result, work_item_ids, body, max_workers)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        for work_item in work_items:
+            action_result.add_data(self._shape_work_item(work_item, **shaping))
+
+        summary["total_work_items"] = action_result.get_data_size()
+
+        self.debug_print(f"{action_result.get_data_size()} work item(s) retrieved successfully")
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _get_work_items_batched(self, action_result, work_item_ids, body, max_workers):
+        """Get work items through the workitemsbatch API, in chunks of 200 ids fetched concurrently.
+
+        :param action_result: object of ActionResult class
+        :param work_item_ids: list of work item ids
+        :param body: workitemsbatch request body without the ids
+        :param max_workers: maximum number of chunks fetched at the same time
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, work items in the order of the ids, ids not found
+        """
+        chunks = [
+            work_item_ids[index : index + consts.WORK_ITEMS_BATCH_SIZE] for index in range(0, len(work_item_ids), consts.WORK_ITEMS_BATCH_SIZE)
+        ]
+
+        def get_chunk(chunk_result, chunk_ids):
+            # omit makes the service skip ids that do not exist instead of failing the whole batch
+            ret_val, response = self._make_rest_call_helper(
+                consts.WORK_ITEMS_BATCH,
+                chunk_result,
+                method="post",
+                json=dict(body, ids=chunk_ids, errorPolicy="omit"),
+                retry=True,
+            )
+            if phantom.is_fail(ret_val):
+                return chunk_result.get_message(), None
+            return None, response
+
+        responses = self._run_concurrently(action_result, get_chunk, chunks, max_workers)
+
+        work_items = []
+        not_found = []
+        for chunk_ids, (error_message, response) in zip(chunks, responses):
+            if error_message is not None:
+                return action_result.set_status(phantom.APP_ERROR, error_message), None, None
+
+            retrieved_ids = set()
+            for work_item in response.get("value", []):
+                if not work_item:
+                    continue
+                retrieved_ids.add(work_item.get("id"))
+                work_items.append(work_item)
+
+            not_found.extend(work_item_id for work_item_id in chunk_ids if work_item_id not in retrieved_ids)
+
+        return phantom.APP_SUCCESS, work_items, not_found
+
+    def _run_concurrently(self, action_result, function, items, max_workers):
+        """Call a function for every item from a pool of threads sharing the session.
+        Every call reports its status on its own action result, the threads must not share one. The debug data
+        of these action results is added to the given action result once all the calls are done.
+
+        :param action_result: object of ActionResult class
+        :param function: function called with an action result and an item
+        :param items: list of items
+        :param max_workers: maximum number of concurrent calls
+        :return: list of the values returned by the function, in the order of the items
+        """
+        # More workers than pooled connections would only queue on the connection pool
+        max_workers = max(1, min(max_workers, consts.AZURE_DEVOPS_POOL_MAXSIZE, len(items)))
+
+        def call(item):
+            item_result = ActionResult()
+            return item_result, function(item_result, item)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(call, items))
+
+        if hasattr(action_result, "add_debug_data"):
+            for item_result, _ in results:
+                for debug_data in item_result.get_debug_data() or []:
+                    action_result.add_debug_data(debug_data)
+
+        return [value for _, value in results]
+
+    def _parse_work_item_ids(self, action_result, work_item_ids):
+        """Parse a comma-separated list of work item ids.
+
+        :param action_result: object of ActionResult class
+        :param work_item_ids: comma-separated work item ids
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, list of unique work item ids in the given order
+        """
+        ids = []
+        for work_item_id in self._parse_comma_separated_list(work_item_ids):
+            ret_val, work_item_id = self._validate_integer(action_result, work_item_id, "work_item_ids")
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), None
+
+            if work_item_id not in ids:
+                ids.append(work_item_id)
+
+        if not ids:
+            return action_result.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_VALID_INT_MESSAGE.format(param="work_item_ids")), None
+
+        return phantom.APP_SUCCESS, ids
+
+    def _get_work_item_shaping(self, param):
+        """Get the work item output shaping options from the action parameters.
+
+        :param param: action parameters
+        :return: dictionary of keyword arguments for _shape_work_item
+        """
+        output_fields = param.get("output_fields")
+        if output_fields:
+            # Field reference names are case-insensitive, they are compared in their flattened form
+            output_fields = {field.replace(".", "-").lower() for field in self._parse_comma_separated_list(output_fields)}
+
+        return {
+            "output_fields": output_fields or None,
+            "strip_links": param.get("strip_links", False),
+            "strip_html": param.get("strip_html", False),
+        }
+
+    def _shape_work_item(self, work_item, output_fields=None, strip_links=False, strip_html=False):
+        """Shape a work item for the action output, in place and in a single pass over its fields.
+        The dots in the field reference names are replaced so they can be used in data paths.
+
+        :param work_item: work item dictionary returned by the API
+        :param output_fields: set of lower-cased flattened field names to keep, None to keep all the fields
+        :param strip_links: remove the _links and url entries of the work item and of its identity fields
+        :param strip_html: convert HTML field values to text
+        :return: shaped work item dictionary
+        """
+        if strip_links:
+            work_item.pop("_links", None)
+            work_item.pop("url", None)
+
+        fields = work_item.get("fields") or {}
+        # Every field is popped and added back under its new name, which keeps the original order
+        for key in list(fields):
+            val = fields.pop(key)
+            temp_key = key.replace(".", "-")
+
+            if output_fields is not None and temp_key.lower() not in output_fields:
+                continue
+
+            if strip_links and isinstance(val, dict):
+                val.pop("_links", None)
+                val.pop("url", None)
+            elif strip_html and isinstance(val, str) and val.lstrip().startswith("<"):
+                val = self._html_to_text(val)
+
+            fields[temp_key] = val
+
+        work_item["fields"] = fields
+        return work_item
+
+    def _html_to_text(self, html):
+        """Convert an HTML field value to text.
+
+        :param html: HTML string
+        :return: text content of the HTML, one line per block
+        """
+        try:
+            from bs4 import BeautifulSoup
+
+            return BeautifulSoup(html, "html.parser").get_text("\n", strip=True)
+        except Exception:
+            return html
+
     def _handle_add_work_item(self, param: dict):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
 
@@ -962,12 +2227,7 @@ class AzureDevopsConnector(BaseConnector):
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
-        temp_fields = {}
-        for key, val in response.get("fields").items():
-            temp_key = key.replace(".", "-")
-            temp_fields[temp_key] = val
-        response["fields"] = temp_fields
-        action_result.add_data(response)
+        action_result.add_data(self._shape_work_item(response, **self._get_work_item_shaping(param)))
 
         summary = action_result.update_summary({})
         summary["status"] = "Work item added successfully"
@@ -998,6 +2258,7 @@ class AzureDevopsConnector(BaseConnector):
 
         team = param.get("team")
         time_frame = param.get("timeframe")
+        force_refresh = param.get("force_refresh", False)
 
         if time_frame:
             params = {"$timeframe": time_frame}
@@ -1009,14 +2270,27 @@ class AzureDevopsConnector(BaseConnector):
         else:
             endpoint = consts.ITERATIONS
 
-        ret_val, response = self._make_rest_call_helper(endpoint, action_result, method="get", params=params)
+        cache_key = f"{team or ''}|{time_frame or ''}"
+        cached = self._state.get(consts.AZURE_DEVOPS_ITERATION_CACHE, {}).get(cache_key, {})
 
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+        if not force_refresh and time.time() - cached.get("updated_at", 0) < self._iteration_cache_ttl:
+            self.debug_print(f"Iterations for '{cache_key}' found in the iteration cache")
+            response = cached["response"]
+            cache_status = "hit"
+        else:
+            ret_val, response = self._make_rest_call_helper(endpoint, action_result, method="get", params=params)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            # A token refresh during the request saves the state and replaces it, so the cache is looked up again
+            self._state.setdefault(consts.AZURE_DEVOPS_ITERATION_CACHE, {})[cache_key] = {"updated_at": int(time.time()), "response": response}
+            cache_status = "miss"
 
         action_result.add_data(response)
 
         summary = action_result.update_summary({})
+        summary["cache"] = cache_status
         try:
             summary["total_iterations"] = action_result.get_data()[0]["count"]
         except Exception:
@@ -1062,58 +2336,141 @@ class AzureDevopsConnector(BaseConnector):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
 
+        output_mode = param.get("output_mode", consts.SEARCH_USERS_OUTPUT_ACTION_RESULT)
+        if output_mode not in consts.SEARCH_USERS_OUTPUT_MODES:
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                consts.AZURE_DEVOPS_VALUE_LIST_MESSAGE.format(param="output_mode", values=", ".join(consts.SEARCH_USERS_OUTPUT_MODES)),
+            )
+
+        ret_val, max_results = self._validate_integer(action_result, param.get("max_results"), "max_results")
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        params = {}
         search_filter = param.get("filter", None)
         if search_filter:
-            param["$filter"] = search_filter
+            params["$filter"] = search_filter
+
+        if output_mode == consts.SEARCH_USERS_OUTPUT_VAULT:
+            return self._search_users_to_vault(action_result, params, max_results)
 
         user_data = {"members": list(), "items": list()}
 
-        ret_val, response = self._make_rest_call_helper(
-            consts.USER_ENTITLEMENTS,
-            action_result,
-            method="get",
-            params=param,
-        )
+        def add_page(items, members):
+            user_data["items"].extend(items)
+            user_data["members"].extend(members)
 
+        ret_val, total_users = self._page_user_entitlements(action_result, params, max_results, add_page)
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
-        user_data["members"].extend(response.get("members", []))
-        user_data["items"].extend(response.get("items", []))
+        action_result.add_data(user_data)
 
-        while True:
-            continuation_token = response.get("continuationToken", None)
-            if not continuation_token:
-                break
-            else:
-                param["continuationToken"] = continuation_token
-                ret_val, response = self._make_rest_call_helper(
-                    consts.USER_ENTITLEMENTS,
-                    action_result,
-                    method="get",
-                    params=param,
-                )
+        summary = action_result.update_summary({})
+        summary["total_users"] = total_users
+        if not total_users:
+            self.save_progress("Items not found")
+            return action_result.set_status(phantom.APP_SUCCESS, "Items not found")
 
-                if phantom.is_fail(ret_val):
-                    return action_result.get_status()
+        self.debug_print("Data retrieved successfully")
+
+        return action_result.set_status(phantom.APP_SUCCESS)
 
-                user_data["members"].extend(response.get("members", []))
-                user_data["items"].extend(response.get("items", []))
+    def _search_users_to_vault(self, action_result, params, max_results):
+        """Stream the user entitlements to a newline-delimited JSON file in the vault, one user per line.
+        Only the current page is held in memory.
 
-        action_result.add_data(user_data)
+        :param action_result: object of ActionResult class
+        :param params: query parameters of the user entitlements request
+        :param max_results: maximum number of users to fetch, None to fetch all
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS
+        """
+        file_name = consts.SEARCH_USERS_VAULT_FILE_NAME.format(timestamp=int(time.time()))
 
         try:
-            summary = action_result.update_summary({})
-            summary["total_users"] = len(action_result.get_data()[0]["items"])
-        except Exception:
-            self.save_progress("Items not found")
-            summary["total_users"] = 0
-            return action_result.set_status(phantom.APP_SUCCESS, "Items not found")
+            fd, tmp_file_path = tempfile.mkstemp(suffix=".ndjson", dir=Vault.get_vault_tmp_dir())
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Unable to create the vault file: {error_message}")
 
-        self.debug_print("Data retrieved successfully")
+        try:
+            with os.fdopen(fd, "w") as ndjson_file:
+
+                def write_page(items, members):
+                    ndjson_file.writelines(f"{json.dumps(item)}\n" for item in items or members)
+
+                ret_val, total_users = self._page_user_entitlements(action_result, params, max_results, write_page)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            success, message, vault_id = phantom_rules.vault_add(
+                container=self.get_container_id(),
+                file_location=tmp_file_path,
+                file_name=file_name,
+            )
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Unable to add the users file to the vault: {error_message}")
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+
+        if not success:
+            return action_result.set_status(phantom.APP_ERROR, f"Unable to add the users file to the vault: {message}")
+
+        action_result.add_data({"vault_id": vault_id, "file_name": file_name, "total_users": total_users})
+
+        summary = action_result.update_summary({})
+        summary["total_users"] = total_users
+        summary["vault_id"] = vault_id
+
+        self.debug_print("Data added to the vault successfully")
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _page_user_entitlements(self, action_result, params, max_results, page_handler):
+        """Follow the continuation token of the user entitlements API and pass every page to the given handler.
+
+        :param action_result: object of ActionResult class
+        :param params: query parameters of the user entitlements request
+        :param max_results: maximum number of users to fetch, None to fetch all
+        :param page_handler: function called with the items and members of every page
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, total number of users fetched
+        """
+        params = dict(params)
+        total_users = 0
+
+        while True:
+            ret_val, response = self._make_rest_call_helper(
+                consts.USER_ENTITLEMENTS,
+                action_result,
+                method="get",
+                params=params,
+            )
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), None
+
+            items = response.get("items", [])
+            members = response.get("members", [])
+            if max_results is not None:
+                items = items[: max_results - total_users]
+                members = members[: max_results - total_users]
+
+            # Older api-versions only return the members array
+            total_users += len(items or members)
+            page_handler(items, members)
+
+            continuation_token = response.get("continuationToken", None)
+            if not continuation_token or (max_results is not None and total_users >= max_results):
+                break
+
+            params["continuationToken"] = continuation_token
+
+        return phantom.APP_SUCCESS, total_users
+
     def _handle_delete_user(self, param: dict):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
 
@@ -1139,28 +2496,15 @@ class AzureDevopsConnector(BaseConnector):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
 
         action_result = self.add_action_result(ActionResult(dict(param)))
-        ret_val, response = self._make_rest_call_helper(
-            consts.GET_PROJECT_LIST_URL.format(organization=self._organization),
-            action_result,
-            method="get",
-            skip_base_url=True,
-        )
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
 
         user_email = param["user_email"]
         account_license_type = param["account_license_type"]
         group_type = param["group_type"]
         project_name = param["project_name"]
 
-        project_id = None
-        for project in response.get("value", []):
-            if project_name.lower() == project["name"].lower():
-                project_id = project["id"]
-                break
-
-        if project_id is None:
-            return action_result.set_status(phantom.APP_ERROR, "No project found with given project name")
+        ret_val, project_id = self._get_project_id(action_result, project_name)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
 
         data = {
             "accessLevel": {"accountLicenseType": account_license_type},
@@ -1192,21 +2536,264 @@ class AzureDevopsConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS, "User with given data added successfully")
 
-    def _get_error_message_from_exception(self, e):
-        """This function is used to get appropriate error message from the exception.
-        :param e: Exception object
-        :return: error message
+    def _get_project_id(self, action_result, project_name):
+        """Get the id of a project of the organization from its name.
+        The name to id index is kept in the state and only downloaded again once it is older than the
+        configured TTL or does not contain the project.
+
+        :param action_result: object of ActionResult class
+        :param project_name: name of the project, compared case-insensitively
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, project id
         """
-        error_code = None
-        error_message = consts.AZURE_DEVOPS_ERROR_MESSAGE_UNAVAILABLE
+        project_key = project_name.lower()
 
-        self.error_print("Error occurred: ", e)
+        project_index = self._state.get(consts.AZURE_DEVOPS_PROJECT_INDEX, {})
+        index_age = time.time() - project_index.get("updated_at", 0)
+        if index_age < self._project_cache_ttl and project_key in project_index.get("projects", {}):
+            self.debug_print(f"Project '{project_name}' found in the project index")
+            return phantom.APP_SUCCESS, project_index["projects"][project_key]
 
-        try:
-            if hasattr(e, "args"):
-                if len(e.args) > 1:
-                    error_code = e.args[0]
-                    error_message = e.args[1]
+        ret_val, projects = self._get_project_index(action_result)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        self._state[consts.AZURE_DEVOPS_PROJECT_INDEX] = {"updated_at": int(time.time()), "projects": projects}
+
+        if project_key not in projects:
+            return action_result.set_status(phantom.APP_ERROR, "No project found with given project name"), None
+
+        return phantom.APP_SUCCESS, projects[project_key]
+
+    def _get_project_index(self, action_result):
+        """Download all the projects of the organization, following the continuation token.
+
+        :param action_result: object of ActionResult class
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, dictionary of lower-cased project name to project id
+        """
+        projects = {}
+        params = {"$top": consts.PROJECT_LIST_PAGE_SIZE}
+
+        while True:
+            ret_val, response = self._make_rest_call_helper(
+                consts.GET_PROJECT_LIST_URL.format(organization=self._organization),
+                action_result,
+                method="get",
+                params=params,
+                skip_base_url=True,
+            )
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), None
+
+            for project in response.get("value", []):
+                projects[project["name"].lower()] = project["id"]
+
+            # The projects API returns the continuation token in a response header
+            continuation_token = self._last_response_headers.get(consts.CONTINUATION_TOKEN_HEADER) or response.get("continuationToken")
+            if not continuation_token:
+                break
+
+            params["continuationToken"] = continuation_token
+
+        return phantom.APP_SUCCESS, projects
+
+    def _handle_add_users(self, param: dict):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        user_emails = self._parse_comma_separated_list(param["user_emails"])
+        if not user_emails:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide at least one email address in the 'user_emails' parameter")
+
+        ret_val, project_id = self._get_project_id(action_result, param["project_name"])
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        operations = [
+            {
+                "from": "",
+                "op": "add",
+                "path": "",
+                "value": {
+                    "accessLevel": {"accountLicenseType": param["account_license_type"]},
+                    "user": {"principalName": user_email, "subjectKind": "user"},
+                    "projectEntitlements": [
+                        {
+                            "group": {"groupType": param["group_type"]},
+                            "projectRef": {"id": project_id},
+                        }
+                    ],
+                },
+            }
+            for user_email in user_emails
+        ]
+
+        return self._patch_user_entitlements(action_result, user_emails, operations)
+
+    def _handle_delete_users(self, param: dict):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        user_ids = self._parse_comma_separated_list(param["user_ids"])
+        if not user_ids:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide at least one user ID in the 'user_ids' parameter")
+
+        operations = [{"op": "remove", "path": f"/{user_id}"} for user_id in user_ids]
+
+        return self._patch_user_entitlements(action_result, user_ids, operations)
+
+    def _handle_update_user_licenses(self, param: dict):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        user_ids = self._parse_comma_separated_list(param["user_ids"])
+        if not user_ids:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide at least one user ID in the 'user_ids' parameter")
+
+        access_level = {"accountLicenseType": param["account_license_type"], "licensingSource": "account"}
+        operations = [{"op": "replace", "path": f"/{user_id}/accessLevel", "value": access_level} for user_id in user_ids]
+
+        return self._patch_user_entitlements(action_result, user_ids, operations)
+
+    def _patch_user_entitlements(self, action_result, users, operations):
+        """Apply JSON patch operations to the user entitlements in batches and add the result of every operation to the action result.
+
+        :param action_result: object of ActionResult class
+        :param users: user identifiers, one per operation, used to label the results
+        :param operations: JSON patch operations, one per user
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS
+        """
+        headers = {"Content-Type": consts.APPLICATION_JSON_PATCH_HEADER}
+        params = {"api-version": consts.USER_ENTITLEMENTS_BATCH_API_VERSION}
+        successful_users = 0
+        pending_users = 0
+        pending_operations = []
+
+        for index in range(0, len(operations), consts.USER_ENTITLEMENTS_BATCH_SIZE):
+            batch_users = users[index : index + consts.USER_ENTITLEMENTS_BATCH_SIZE]
+
+            ret_val, response = self._make_rest_call_helper(
+                consts.USER_ENTITLEMENTS,
+                action_result,
+                method="patch",
+                data=json.dumps(operations[index : index + consts.USER_ENTITLEMENTS_BATCH_SIZE]),
+                params=params,
+                headers=headers,
+            )
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            # The results are only available once the operation of the batch has completed
+            ret_val, response = self._wait_for_operation(action_result, response)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            completed = self._is_operation_completed(response)
+            status = response.get("status")
+
+            # The results are returned in the order of the operations
+            operation_results = response.get("results") or []
+            for user, operation_result in zip(batch_users, operation_results):
+                operation_result["user"] = user
+                successful_users += bool(operation_result.get("isSuccess"))
+                action_result.add_data(operation_result)
+
+            # Without per-user results, the users take the outcome of the operation
+            for user in batch_users[len(operation_results) :]:
+                is_success = completed and str(status).lower() == consts.OPERATION_SUCCEEDED_STATUS
+                successful_users += is_success
+                action_result.add_data(
+                    {"user": user, "isSuccess": is_success, "errors": [], "status": status, "operationId": response.get("id")}
+                )
+                if not completed:
+                    pending_users += 1
+
+            if not completed:
+                pending_operations.append(response.get("id"))
+
+        summary = action_result.update_summary({})
+        summary["total_users"] = len(users)
+        summary["successful_users"] = successful_users
+        summary["pending_users"] = pending_users
+        summary["failed_users"] = len(users) - successful_users - pending_users
+
+        if pending_users:
+            return action_result.set_status(
+                phantom.APP_SUCCESS,
+                f"{pending_users} user entitlement change(s) still in progress, operation(s): {', '.join(map(str, pending_operations))}",
+            )
+
+        if not successful_users:
+            return action_result.set_status(phantom.APP_ERROR, "None of the user entitlements could be updated")
+
+        self.debug_print(f"{successful_users} of {len(users)} user entitlement(s) updated successfully")
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _is_operation_completed(self, operation):
+        """Check whether an asynchronous operation has completed.
+
+        :param operation: operation reference returned by the API
+        :return: True if the operation has completed, else False
+        """
+        if operation.get("completed"):
+            return True
+
+        status = operation.get("status")
+        # A response without an operation status was processed synchronously
+        return status is None or str(status).lower() in consts.OPERATION_COMPLETED_STATUSES
+
+    def _wait_for_operation(self, action_result, operation):
+        """Poll an asynchronous operation until it completes or USER_ENTITLEMENTS_OPERATION_TIMEOUT elapses.
+
+        :param action_result: object of ActionResult class
+        :param operation: operation reference returned by the API
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, latest operation reference
+        """
+        deadline = time.time() + consts.USER_ENTITLEMENTS_OPERATION_TIMEOUT
+
+        while not self._is_operation_completed(operation) and operation.get("id") and time.time() < deadline:
+            time.sleep(consts.USER_ENTITLEMENTS_OPERATION_POLL_INTERVAL)
+
+            ret_val, response = self._make_rest_call_helper(f"{consts.OPERATIONS}/{operation['id']}", action_result)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status(), None
+
+            # The operation status does not always carry the results, the ones already received are kept
+            operation = {**operation, **{key: value for key, value in response.items() if value is not None}}
+
+        return phantom.APP_SUCCESS, operation
+
+    def _parse_comma_separated_list(self, value):
+        """Split a comma-separated parameter into a list of unique, non-empty values keeping their order.
+
+        :param value: comma-separated string
+        :return: list of values
+        """
+        values = []
+        for item in str(value).split(","):
+            item = item.strip()
+            if item and item not in values:
+                values.append(item)
+        return values
+
+    def _get_error_message_from_exception(self, e):
+        """This function is used to get appropriate error message from the exception.
+        :param e: Exception object
+        :return: error message
+        """
+        error_code = None
+        error_message = consts.AZURE_DEVOPS_ERROR_MESSAGE_UNAVAILABLE
+
+        self.error_print("Error occurred: ", e)
+
+        try:
+            if hasattr(e, "args"):
+                if len(e.args) > 1:
+                    error_code = e.args[0]
+                    error_message = e.args[1]
                 elif len(e.args) == 1:
                     error_message = e.args[0]
         except Exception as e:
@@ -1219,6 +2806,31 @@ class AzureDevopsConnector(BaseConnector):
 
         return error_text
 
+    def _validate_integer(self, action_result, parameter, key, allow_zero=False):
+        """Validate an integer.
+
+        :param action_result: Action result or BaseConnector object
+        :param parameter: input parameter
+        :param key: input parameter message key
+        :param allow_zero: whether zero should be considered as valid value or not
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, integer value of the parameter or None in case of failure
+        """
+        if parameter is not None:
+            try:
+                if not float(parameter).is_integer():
+                    return action_result.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_VALID_INT_MESSAGE.format(param=key)), None
+
+                parameter = int(parameter)
+            except Exception:
+                return action_result.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_VALID_INT_MESSAGE.format(param=key)), None
+
+            if parameter < 0:
+                return action_result.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_NON_NEG_INT_MESSAGE.format(param=key)), None
+            if not allow_zero and parameter == 0:
+                return action_result.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_NON_NEG_NON_ZERO_INT_MESSAGE.format(param=key)), None
+
+        return phantom.APP_SUCCESS, parameter
+
     def _get_base_url(self, action_id):
         """Utility method to get the base url for a given action.
         :param action_id (str): action identifier
@@ -1228,34 +2840,149 @@ class AzureDevopsConnector(BaseConnector):
             "delete_user": self._user_entitlement_base_url,
             "search_users": self._user_entitlement_base_url,
             "add_user": self._user_entitlement_base_url,
+            "add_users": self._user_entitlement_base_url,
+            "delete_users": self._user_entitlement_base_url,
+            "update_user_licenses": self._user_entitlement_base_url,
             "get_work_item": self._base_url,
+            "get_work_items": self._base_url,
+            "query_work_items": self._base_url,
             "add_work_item": self._base_url,
             "list_iterations": self._base_url,
             "add_comment": self._base_url,
             "test_connectivity": self._base_url,
             "add_attachment": self._base_url,
+            "add_attachments": self._base_url,
+            "on_poll": self._base_url,
         }
 
         return action_to_url_mapping_dict.get(action_id, None)
 
     def _handle_add_attachment(self, param):
-        # Implement the handler here
-        # use self.save_progress(...) to send progress messages back to the platform
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
 
         # Add an action result object to self (BaseConnector) to represent the action for this param
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        # Access action parameters passed in the 'param' dictionary
-
         # Required values can be accessed directly
         vault_id = param["vault_id"]
         filename = param["filename"]
+        api_version = param["api_version"]
+
+        ret_val, chunk_size = self._validate_integer(
+            action_result, param.get("chunk_size", consts.ADD_ATTACHMENT_DEFAULT_CHUNK_SIZE), "chunk_size"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, response = self._upload_vault_file(action_result, vault_id, filename, chunk_size * consts.BYTES_IN_MB, api_version)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # Add the response into the data section
+        action_result.add_data(response)
+
+        return action_result.set_status(phantom.APP_SUCCESS, "Successfully added the attachment")
+
+    def _handle_add_attachments(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        vault_ids = self._parse_comma_separated_list(param["vault_ids"])
+        if not vault_ids:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide at least one vault ID in the 'vault_ids' parameter")
 
+        work_item_id = param.get("work_item_id")
+        comment = param.get("comment")
+        api_version = param.get("api_version") or self._api_version
+
+        ret_val, chunk_size = self._validate_integer(
+            action_result, param.get("chunk_size", consts.ADD_ATTACHMENT_DEFAULT_CHUNK_SIZE), "chunk_size"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, max_workers = self._validate_integer(
+            action_result, param.get("max_workers", consts.ADD_ATTACHMENTS_DEFAULT_WORKERS), "max_workers"
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        if work_item_id is not None:
+            ret_val, work_item_id = self._validate_integer(action_result, work_item_id, "work_item_id")
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+        def upload(upload_result, vault_id):
+            ret_val, attachment = self._upload_vault_file(upload_result, vault_id, None, chunk_size * consts.BYTES_IN_MB, api_version)
+            if phantom.is_fail(ret_val):
+                return {"vault_id": vault_id, "status": "failed", "message": upload_result.get_message()}
+            return {"vault_id": vault_id, "status": "success", "id": attachment.get("id"), "url": attachment.get("url")}
+
+        self.save_progress(f"Uploading {len(vault_ids)} file(s)")
+        uploads = self._run_concurrently(action_result, upload, vault_ids, max_workers)
+
+        for attachment in uploads:
+            action_result.add_data(attachment)
+
+        uploaded = [attachment for attachment in uploads if attachment["status"] == "success"]
+
+        summary = action_result.update_summary({})
+        summary["total_files"] = len(uploads)
+        summary["uploaded_files"] = len(uploaded)
+        summary["failed_files"] = len(uploads) - len(uploaded)
+
+        if not uploaded:
+            return action_result.set_status(phantom.APP_ERROR, "None of the files could be uploaded")
+
+        if work_item_id is None:
+            return action_result.set_status(phantom.APP_SUCCESS)
+
+        # All the uploaded files are linked to the work item with a single JSON patch request
+        relation_attributes = {"comment": comment} if comment else {}
+        operations = [
+            {
+                "op": "add",
+                "path": "/relations/-",
+                "value": {"rel": "AttachedFile", "url": attachment["url"], "attributes": relation_attributes},
+            }
+            for attachment in uploaded
+        ]
+
+        ret_val, response = self._make_rest_call_helper(
+            f"{consts.WORK_ITEMS}/{work_item_id}",
+            action_result,
+            method="patch",
+            data=json.dumps(operations),
+            params={"api-version": api_version},
+            headers={"Content-Type": consts.APPLICATION_JSON_PATCH_HEADER},
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        summary["work_item_id"] = work_item_id
+        summary["work_item_rev"] = response.get("rev")
+
+        self.debug_print(f"{len(uploaded)} attachment(s) linked to work item {work_item_id}")
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _upload_vault_file(self, action_result, vault_id, file_name, chunk_size, api_version):
+        """Upload a vault file as an attachment.
+
+        :param action_result: object of ActionResult class
+        :param vault_id: vault ID of the file
+        :param file_name: name of the attachment, the name of the vault file is used if not provided
+        :param chunk_size: size in bytes above which the file is uploaded in chunks
+        :param api_version: version of the API to use
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, attachment reference
+        """
         try:
             success, msg, vault_info = phantom_rules.vault_info(vault_id=vault_id)
         except Exception:
-            return action_result.set_status(phantom.APP_ERROR, "Error occurred while fetching the vault information of the specified Vault ID")
+            return action_result.set_status(
+                phantom.APP_ERROR, "Error occurred while fetching the vault information of the specified Vault ID"
+            ), None
 
         if not vault_info:
             try:
@@ -1263,74 +2990,398 @@ class AzureDevopsConnector(BaseConnector):
             except Exception:
                 error_msg = "Error occurred while fetching the vault information of the specified Vault ID"
 
-            return action_result.set_status(phantom.APP_ERROR, error_msg)
+            return action_result.set_status(phantom.APP_ERROR, error_msg), None
 
-        # Loop through the Vault information
-        for item in vault_info:
-            vault_path = item.get("path")
-            if vault_path is None:
-                return action_result.set_status(phantom.APP_ERROR, "Could not find a path associated with the provided Vault ID")
-            try:
-                # Open the file
-                vault_file = open(vault_path, "rb").read()
-                # Create the files data to send to the console
-            except Exception as e:
-                error_message = self._get_error_message_from_exception(e)
-                return action_result.set_status(phantom.APP_ERROR, f"Unable to open vault file: {error_message}")
+        vault_path = vault_info[0].get("path")
+        if vault_path is None:
+            return action_result.set_status(phantom.APP_ERROR, "Could not find a path associated with the provided Vault ID"), None
+
+        file_name = file_name or vault_info[0].get("name") or os.path.basename(vault_path)
+
+        try:
+            file_size = os.path.getsize(vault_path)
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Unable to open vault file: {error_message}"), None
 
-        headers = self._get_request_headers()
-        headers.update(headers)
-        headers["Content-Type"] = consts.OCTANT_HEADER_STRING
+        # Files larger than one chunk are uploaded with the chunked attachment protocol so that
+        # at most one chunk is held in memory and no single request exceeds the size limit
+        if file_size > chunk_size:
+            return self._upload_attachment_chunked(action_result, vault_path, file_name, file_size, chunk_size, api_version)
 
-        params = {"fileName": filename}
+        return self._upload_attachment(action_result, vault_path, file_name, api_version)
 
-        # Optional values should use the .get() function
-        # optional_parameter = param.get('optional_parameter', 'default_value')
+    def _upload_attachment(self, action_result, file_path, file_name, api_version):
+        """Upload a file that fits in a single chunk as an attachment.
 
-        # make rest call
-        ret_val, response = self._make_rest_call(
-            "/_apis/wit/attachments",
+        :param action_result: object of ActionResult class
+        :param file_path: path of the file to upload
+        :param file_name: name of the attachment
+        :param api_version: version of the API to use
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, attachment reference
+        """
+        try:
+            with open(file_path, "rb") as attachment_file:
+                file_content = attachment_file.read()
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Unable to open vault file: {error_message}"), None
+
+        return self._make_rest_call_helper(
+            consts.ATTACHMENTS,
             action_result,
-            headers=headers,
             method="post",
-            params=params,
-            data=vault_file,
-            api_version=param["api_version"],
+            data=file_content,
+            params={"fileName": file_name, "api-version": api_version},
+            headers={"Content-Type": consts.OCTANT_HEADER_STRING},
         )
 
+    def _upload_attachment_chunked(self, action_result, file_path, file_name, file_size, chunk_size, api_version):
+        """Upload a file as an attachment in chunks read from disk one at a time.
+        A chunk that fails is sent again from the same offset before the upload is given up.
+
+        :param action_result: object of ActionResult class
+        :param file_path: path of the file to upload
+        :param file_name: name of the attachment
+        :param file_size: size of the file in bytes
+        :param chunk_size: size of the chunks in bytes
+        :param api_version: version of the API to use
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS, attachment reference
+        """
+        params = {"fileName": file_name, "api-version": api_version}
+
+        # Start the chunked upload, the returned id is the one the chunks are sent to
+        ret_val, attachment = self._make_rest_call_helper(
+            consts.ATTACHMENTS,
+            action_result,
+            method="post",
+            params=dict(params, uploadType="Chunked"),
+            headers={"Content-Type": consts.OCTANT_HEADER_STRING},
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status(), None
+
+        if not attachment.get("id"):
+            return action_result.set_status(phantom.APP_ERROR, "Unable to start the chunked upload of the attachment"), None
+
+        try:
+            attachment_file = open(file_path, "rb")
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Unable to open vault file: {error_message}"), None
+
+        with attachment_file:
+            offset = 0
+            while offset < file_size:
+                chunk = attachment_file.read(chunk_size)
+                if not chunk:
+                    return action_result.set_status(
+                        phantom.APP_ERROR, "Vault file is smaller than expected, it may have changed during the upload"
+                    ), None
+
+                headers = {
+                    "Content-Type": consts.OCTANT_HEADER_STRING,
+                    "Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{file_size}",
+                }
+                self.send_progress(f"Uploading bytes {offset}-{offset + len(chunk) - 1} of {file_size}")
+
+                for attempt in range(1, consts.ADD_ATTACHMENT_CHUNK_RETRIES + 1):
+                    ret_val, _ = self._make_rest_call_helper(
+                        f"{consts.ATTACHMENTS}/{attachment['id']}",
+                        action_result,
+                        method="put",
+                        data=chunk,
+                        params=params,
+                        headers=headers,
+                    )
+                    if phantom.is_success(ret_val):
+                        break
+
+                    if attempt < consts.ADD_ATTACHMENT_CHUNK_RETRIES:
+                        self.save_progress(f"Upload of the chunk at offset {offset} failed, retrying (attempt {attempt + 1})")
+                        time.sleep(consts.ADD_ATTACHMENT_CHUNK_RETRY_WAIT * attempt)
+                else:
+                    return action_result.get_status(), None
+
+                offset += len(chunk)
+
+        return phantom.APP_SUCCESS, attachment
+
+    def _handle_on_poll(self, param: dict):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        label = self.get_config().get("ingest", {}).get("container_label")
+
+        if self.is_poll_now():
+            # Poll now starts from the first poll lookback and leaves the checkpoint of the scheduled polls untouched
+            checkpoint = {}
+            ret_val, max_work_items = self._validate_integer(
+                action_result, param.get("container_count", self._poll_max_work_items), "container_count"
+            )
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+        else:
+            checkpoint = self._state.get(consts.AZURE_DEVOPS_POLL_CHECKPOINT, {})
+            max_work_items = self._poll_max_work_items
+
+        watermark = checkpoint.get("watermark")
+        if not watermark:
+            first_poll_start = datetime.now(timezone.utc) - timedelta(days=self._first_poll_days)
+            watermark = self._normalize_changed_date(first_poll_start.strftime("%Y-%m-%dT%H:%M:%S.%fZ"))
+        last_change = (watermark, checkpoint.get("last_id", 0))
+
+        # The query only returns the work items changed after the checkpoint, so the cost follows the change rate.
+        # The work items changed at the watermark itself are ordered by id, so a page of work items sharing one
+        # changed date does not make the next poll query the same page again.
+        self.save_progress(f"Querying the work items changed since {watermark}")
+        query = consts.POLL_CHANGED_WORK_ITEMS_QUERY.format(watermark=f"{watermark[:23]}Z", last_id=int(last_change[1]))
+        ret_val, response = self._make_rest_call_helper(
+            consts.WIQL,
+            action_result,
+            method="post",
+            json={"query": query},
+            # timePrecision makes the service compare the time of the changed date and not only the day
+            params={"$top": max_work_items, "timePrecision": "true"},
+            retry=True,
+        )
         if phantom.is_fail(ret_val):
-            # the call to the 3rd party device or service failed, action result should contain all the error details
-            # for now the return is commented out, but after implementation, return from here
             return action_result.get_status()
-            # pass
 
-        # Now post process the data,  uncomment code as you deem fit
+        work_item_ids = [reference["id"] for reference in response.get("workItems", [])]
+        self.save_progress(f"Found {len(work_item_ids)} changed work item(s)")
 
-        # Add the response into the data section
-        action_result.add_data(response)
+        # Fetch the work items as they were at the query time so their changed dates follow the query order
+        body = {"$expand": "None"}
+        if response.get("asOf"):
+            body["asOf"] = response["asOf"]
 
-        # Add a dictionary that is made up of the most important values from data into the summary
-        # summary = action_result.update_summary({})
-        # summary['num_data'] = len(action_result['data'])
+        total_containers = 0
+        for index in range(0, len(work_item_ids), consts.WORK_ITEMS_BATCH_SIZE):
+            ret_val, work_items, _ = self._get_work_items_batched(
+                action_result, work_item_ids[index : index + consts.WORK_ITEMS_BATCH_SIZE], body, 1
+            )
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
 
-        # Return success, no need to set the message, only the status
-        # BaseConnector will create a textual message based off of the summary dictionary
-        return action_result.set_status(phantom.APP_SUCCESS, "Successfully added the attachment")
+            containers = []
+            batch_last_change = last_change
+            for work_item in sorted(work_items, key=self._get_work_item_change):
+                change = self._get_work_item_change(work_item)
+                # The query compares the changed dates in milliseconds, the changes up to the checkpoint were ingested already
+                if change <= last_change:
+                    continue
+                batch_last_change = change
+                batch_last_rev = work_item.get("rev")
+                containers.append(self._create_work_item_container(work_item, label))
+
+            if not containers:
+                continue
+
+            ret_val, message, _ = self.save_containers(containers)
+            if phantom.is_fail(ret_val):
+                return action_result.set_status(phantom.APP_ERROR, f"Error occurred while saving the containers. {message}")
+
+            total_containers += len(containers)
+            last_change = batch_last_change
+            self.save_progress(f"Ingested {total_containers} work item change(s)")
+
+            if not self.is_poll_now():
+                self._state[consts.AZURE_DEVOPS_POLL_CHECKPOINT] = {
+                    "watermark": last_change[0],
+                    "last_id": last_change[1],
+                    "last_rev": batch_last_rev,
+                }
+                if phantom.is_fail(self._save_state()):
+                    return action_result.set_status(phantom.APP_ERROR, self.get_status_message())
+
+        summary = action_result.update_summary({})
+        summary["total_containers"] = total_containers
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _get_work_item_change(self, work_item):
+        """Get the position of a work item change in the poll order.
+
+        :param work_item: work item as returned by the API
+        :return: tuple of the normalized changed date and the work item id
+        """
+        return self._normalize_changed_date(work_item.get("fields", {}).get("System.ChangedDate", "")), work_item.get("id", 0)
+
+    def _normalize_changed_date(self, changed_date):
+        """Pad the fraction of seconds of an UTC date time string so the date time strings compare in time order.
+
+        :param changed_date: UTC date time string, e.g. 2024-01-10T12:34:56.78Z
+        :return: date time string with a six digit fraction of seconds
+        """
+        date_time, _, fraction = changed_date.rstrip("Z").partition(".")
+        return f"{date_time}.{fraction[:6].ljust(6, '0')}Z"
 
-        # For now return Error with a message, in case of success we don't set the message, but use the summary
-        # return action_result.set_status(phantom.APP_ERROR, "Action not yet implemented")
+    def _create_work_item_container(self, work_item, label):
+        """Create the container of a work item with an artifact for its current revision.
+
+        The container is identified by the work item id and the artifact by the id and the revision, so
+        polling a changed work item again adds an artifact to the existing container.
+
+        :param work_item: work item as returned by the API
+        :param label: label of the container
+        :return: container dictionary
+        """
+        work_item_id = work_item.get("id")
+        fields = work_item.get("fields", {})
+        work_item_type = fields.get("System.WorkItemType", "Work Item")
+        title = fields.get("System.Title", "")
+
+        artifact = {
+            "name": consts.WORK_ITEM_ARTIFACT_NAME,
+            "label": consts.WORK_ITEM_ARTIFACT_LABEL,
+            "source_data_identifier": f"{work_item_id}_{work_item.get('rev')}",
+            "cef": {
+                "workItemId": work_item_id,
+                "rev": work_item.get("rev"),
+                "workItemType": work_item_type,
+                "title": title,
+                "state": fields.get("System.State"),
+                "changedBy": (fields.get("System.ChangedBy") or {}).get("uniqueName"),
+                "changedDate": fields.get("System.ChangedDate"),
+                "url": work_item.get("url"),
+            },
+            "cef_types": {"workItemId": ["work item id"], "url": ["url"]},
+            "run_automation": True,
+        }
+
+        return {
+            "name": f"{work_item_type} {work_item_id}: {title}",
+            "label": label,
+            "source_data_identifier": str(work_item_id),
+            "data": self._shape_work_item(work_item),
+            "artifacts": [artifact],
+        }
 
     def handle_action(self, param):
+        action_id = self.get_action_identifier()
+        if self._profile_mode == consts.PROFILE_MODE_OFF or (self._profile_actions and action_id not in self._profile_actions):
+            return self._dispatch_action(param)
+
+        return self._profile_action(param)
+
+    def _profile_action(self, param):
+        """Run the action handler under cProfile and tracemalloc, according to the profile_mode setting.
+        The pstats file and the allocation report are written next to the asset state, a summary of the top
+        functions and allocation sites goes to the debug output.
+
+        :param param: dictionary of input parameters
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS
+        """
+        # The profilers are only imported when profiling is enabled
+        import cProfile
+        import io
+        import pstats
+        import tracemalloc
+
+        action_id = self.get_action_identifier()
+        profile_cpu = self._profile_mode in (consts.PROFILE_MODE_CPU, consts.PROFILE_MODE_CPU_AND_MEMORY)
+        profile_memory = self._profile_mode in (consts.PROFILE_MODE_MEMORY, consts.PROFILE_MODE_CPU_AND_MEMORY)
+        # When another tool already started tracemalloc, it is left running
+        start_tracemalloc = profile_memory and not tracemalloc.is_tracing()
+
+        profiler = cProfile.Profile() if profile_cpu else None
+        if start_tracemalloc:
+            tracemalloc.start(consts.PROFILE_TRACEMALLOC_FRAMES)
+        if profile_memory:
+            tracemalloc.reset_peak()
+        if profiler:
+            profiler.enable()
+
+        try:
+            return self._dispatch_action(param)
+        finally:
+            if profiler:
+                profiler.disable()
+
+            snapshot = None
+            if profile_memory:
+                _, peak_memory = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+                )
+            if start_tracemalloc:
+                tracemalloc.stop()
+
+            file_prefix = f"{consts.PROFILE_FILE_PREFIX}{action_id}_{int(time.time() * 1000)}_{os.getpid()}"
+            try:
+                if profiler:
+                    stats_file_path = _get_asset_file_path(self.get_asset_id(), f"{file_prefix}.pstats", self)
+                    if stats_file_path:
+                        profiler.dump_stats(stats_file_path)
+                        self.debug_print(f"Profile of the action written to {stats_file_path}")
+
+                    stats_output = io.StringIO()
+                    pstats.Stats(profiler, stream=stats_output).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(consts.PROFILE_TOP_N)
+                    self.debug_print(f"Top {consts.PROFILE_TOP_N} functions by cumulative time:\n{stats_output.getvalue()}")
+
+                if snapshot:
+                    statistics = snapshot.statistics("lineno")
+                    # tracemalloc only snapshots the live allocations, the ones freed before the end are not listed
+                    report_lines = [
+                        f"Peak traced memory: {peak_memory / 1024:.1f} KiB",
+                        f"Memory still allocated at the end of the action: {sum(statistic.size for statistic in statistics) / 1024:.1f} KiB",
+                        "Top allocation sites of the memory still allocated at the end of the action, not at the peak:",
+                    ]
+                    report_lines.extend(str(statistic) for statistic in statistics[: consts.PROFILE_REPORT_TOP_N])
+
+                    report_file_path = _get_asset_file_path(self.get_asset_id(), f"{file_prefix}.memory.txt", self)
+                    if report_file_path:
+                        _write_file_atomically(report_file_path, "\n".join(report_lines) + "\n")
+                        self.debug_print(f"Allocation report of the action written to {report_file_path}")
+
+                    self.debug_print("\n".join(report_lines[: consts.PROFILE_TOP_N + 3]))
+
+                self._remove_old_profiles()
+            except Exception as e:
+                self.debug_print(f"Unable to write the profile of the action: {self._get_error_message_from_exception(e)}")
+
+    def _remove_old_profiles(self):
+        """Remove the report files of the oldest profiled runs of the asset, keeping the PROFILE_MAX_RUNS most recent runs.
+        The files of a run share the name before their extension, a run may have a pstats file, a memory report or both.
+        """
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        prefix = f"{self.get_asset_id()}_{consts.PROFILE_FILE_PREFIX}"
+
+        runs = {}
+        for file_name in os.listdir(app_dir):
+            if file_name.startswith(prefix):
+                runs.setdefault(file_name.split(".", 1)[0], []).append(os.path.join(app_dir, file_name))
+
+        run_file_paths = sorted(runs.values(), key=lambda file_paths: max(os.path.getmtime(file_path) for file_path in file_paths))
+        for file_paths in run_file_paths[: -consts.PROFILE_MAX_RUNS]:
+            for file_path in file_paths:
+                os.remove(file_path)
+
+    def _dispatch_action(self, param):
         ret_val = phantom.APP_SUCCESS
 
         # Get the action that we are supposed to execute for this App Run
         action_id = self.get_action_identifier()
 
+        with self._request_trace_lock:
+            self._request_trace = []
+            self._token_refreshes = 0
+        action_result_count = len(self.get_action_results())
+        action_start = time.perf_counter()
+
         self.debug_print("action_id", self.get_action_identifier())
 
         if action_id == "get_work_item":
             ret_val = self._handle_get_work_item(param)
 
+        if action_id == "get_work_items":
+            ret_val = self._handle_get_work_items(param)
+
+        if action_id == "query_work_items":
+            ret_val = self._handle_query_work_items(param)
+
         if action_id == "add_work_item":
             ret_val = self._handle_add_work_item(param)
 
@@ -1349,12 +3400,40 @@ class AzureDevopsConnector(BaseConnector):
         if action_id == "add_user":
             ret_val = self._handle_add_user(param)
 
+        if action_id == "add_users":
+            ret_val = self._handle_add_users(param)
+
+        if action_id == "delete_users":
+            ret_val = self._handle_delete_users(param)
+
+        if action_id == "update_user_licenses":
+            ret_val = self._handle_update_user_licenses(param)
+
         if action_id == "add_attachment":
             ret_val = self._handle_add_attachment(param)
 
+        if action_id == "add_attachments":
+            ret_val = self._handle_add_attachments(param)
+
+        if action_id == "on_poll":
+            ret_val = self._handle_on_poll(param)
+
         if action_id == "test_connectivity":
             ret_val = self._handle_test_connectivity(param)
 
+        if self._request_stats:
+            request_summary = self._get_request_summary()
+            for action_result in self.get_action_results()[action_result_count:]:
+                action_result.update_summary({"requests": request_summary})
+            self.debug_print("Request summary: ", request_summary)
+            self.debug_print("Request trace: ", self._request_trace)
+
+        if self._metrics_enabled:
+            with self._request_trace_lock:
+                self._metrics_requests.extend(self._request_trace)
+                self._metrics_token_refreshes += self._token_refreshes
+            self._metrics_actions.append((action_id, "failed" if phantom.is_fail(ret_val) else "success", time.perf_counter() - action_start))
+
         return ret_val
 
     def initialize(self):
@@ -1367,6 +3446,8 @@ class AzureDevopsConnector(BaseConnector):
             self._state = {"app_version": self.get_app_json().get("app_version")}
             return self.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_STATE_FILE_CORRUPT_ERROR)
 
+        self._saved_state = copy.deepcopy(self._state)
+
         # get the asset config
         config = self.get_config()
 
@@ -1381,6 +3462,97 @@ class AzureDevopsConnector(BaseConnector):
         self._tenant_id = config.get("tenant_id", None)
         self._base_url = consts.PROJECT_BASE_URL.format(organization=self._organization, project=self._project)
         self._user_entitlement_base_url = consts.USER_ENTITLEMENT_URL.format(organization=self._organization)
+        self._rate_limited_hosts = {
+            urlparse.urlsplit(url).hostname
+            for url in (self._base_url, self._user_entitlement_base_url, consts.GET_PROJECT_LIST_URL.format(organization=self._organization))
+        }
+        self._session = self._create_session()
+
+        ret_val, self._token_expiry_skew = self._validate_integer(
+            self, config.get("token_expiry_skew", consts.AZURE_DEVOPS_DEFAULT_TOKEN_EXPIRY_SKEW), "token_expiry_skew", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        self._debug_capture = config.get("debug_capture", consts.DEBUG_CAPTURE_ON_FAILURE)
+        if self._debug_capture not in consts.DEBUG_CAPTURE_MODES:
+            return self.set_status(
+                phantom.APP_ERROR,
+                consts.AZURE_DEVOPS_VALUE_LIST_MESSAGE.format(param="debug_capture", values=", ".join(consts.DEBUG_CAPTURE_MODES)),
+            )
+
+        self._profile_mode = config.get("profile_mode", consts.PROFILE_MODE_OFF)
+        if self._profile_mode not in consts.PROFILE_MODES:
+            return self.set_status(
+                phantom.APP_ERROR,
+                consts.AZURE_DEVOPS_VALUE_LIST_MESSAGE.format(param="profile_mode", values=", ".join(consts.PROFILE_MODES)),
+            )
+        self._profile_actions = self._parse_comma_separated_list(config.get("profile_actions") or "")
+
+        ret_val, self._debug_max_bytes = self._validate_integer(
+            self, config.get("debug_max_bytes", consts.AZURE_DEVOPS_DEFAULT_DEBUG_MAX_BYTES), "debug_max_bytes", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        self._request_stats = config.get("request_stats", False)
+        self._metrics_enabled = config.get("export_metrics", False)
+
+        ret_val, self._request_rate = self._validate_integer(
+            self, config.get("rate_limit", consts.AZURE_DEVOPS_DEFAULT_RATE_LIMIT), "rate_limit", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._max_retry_wait = self._validate_integer(
+            self, config.get("max_retry_wait", consts.AZURE_DEVOPS_DEFAULT_MAX_RETRY_WAIT), "max_retry_wait", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._project_cache_ttl = self._validate_integer(
+            self, config.get("project_cache_ttl", consts.AZURE_DEVOPS_DEFAULT_PROJECT_CACHE_TTL), "project_cache_ttl", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        self._work_item_cache = config.get("work_item_cache", False)
+
+        ret_val, self._work_item_cache_ttl = self._validate_integer(
+            self, config.get("work_item_cache_ttl", consts.WORK_ITEM_CACHE_DEFAULT_TTL), "work_item_cache_ttl", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._work_item_cache_max_items = self._validate_integer(
+            self, config.get("work_item_cache_max_items", consts.WORK_ITEM_CACHE_DEFAULT_MAX_ITEMS), "work_item_cache_max_items"
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._authorization_timeout = self._validate_integer(
+            self, config.get("authorization_timeout", consts.AZURE_DEVOPS_DEFAULT_AUTHORIZATION_TIMEOUT), "authorization_timeout"
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._iteration_cache_ttl = self._validate_integer(
+            self, config.get("iteration_cache_ttl", consts.AZURE_DEVOPS_DEFAULT_ITERATION_CACHE_TTL), "iteration_cache_ttl", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._first_poll_days = self._validate_integer(
+            self, config.get("first_poll_days", consts.AZURE_DEVOPS_DEFAULT_FIRST_POLL_DAYS), "first_poll_days", allow_zero=True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._poll_max_work_items = self._validate_integer(
+            self, config.get("poll_max_work_items", consts.AZURE_DEVOPS_DEFAULT_POLL_MAX_WORK_ITEMS), "poll_max_work_items"
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
 
         self._access_token = self._state.get(consts.AZURE_DEVOPS_TOKEN_STRING, {}).get(consts.AZURE_DEVOPS_ACCESS_TOKEN_STRING, None)
         if self._state.get(consts.AZURE_DEVOPS_STATE_IS_ENCRYPTED) and self._access_token:
@@ -1398,34 +3570,139 @@ class AzureDevopsConnector(BaseConnector):
                 self.error_print(f"{consts.AZURE_DEVOPS_DECRYPTION_ERROR}: {self._get_error_message_from_exception(e)}")
                 return self.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_DECRYPTION_ERROR)
 
+        self._set_session_token()
+
         return phantom.APP_SUCCESS
 
-    def finalize(self):
-        try:
-            if self._access_token:
-                if consts.AZURE_DEVOPS_TOKEN_STRING not in self._state:
-                    self._state[consts.AZURE_DEVOPS_TOKEN_STRING] = {}
+    def _save_state(self):
+        """Save the state with the tokens encrypted if it changed, this data is saved across actions and app upgrades.
+
+        The tokens are only encrypted again when they changed. Under the state lock, the keys changed by the action
+        are merged into the state file, so the changes saved by other actions of the asset in the meantime are kept.
+        The caches are merged entry by entry, so concurrent actions caching different entries keep all of them.
+
+        :return: status phantom.APP_ERROR/phantom.APP_SUCCESS
+        """
+        saved_state = self._saved_state or {}
+        was_encrypted = saved_state.get(consts.AZURE_DEVOPS_STATE_IS_ENCRYPTED)
+        if self._state == saved_state and was_encrypted:
+            self.debug_print("State unchanged, skipping the state save")
+            return phantom.APP_SUCCESS
 
-                self._state[consts.AZURE_DEVOPS_TOKEN_STRING][consts.AZURE_DEVOPS_ACCESS_TOKEN_STRING] = self.encrypt_state(self._access_token)
+        state = dict(self._state)
+        saved_token = saved_state.get(consts.AZURE_DEVOPS_TOKEN_STRING)
+        tokens_changed = state.get(consts.AZURE_DEVOPS_TOKEN_STRING) != saved_token or not was_encrypted
+
+        try:
+            if self._access_token and tokens_changed:
+                token = dict(state.get(consts.AZURE_DEVOPS_TOKEN_STRING, {}))
+                token[consts.AZURE_DEVOPS_ACCESS_TOKEN_STRING] = self.encrypt_state(self._access_token)
 
                 # Only encrypt refresh token if it exists (not always present)
                 if self._refresh_token:
-                    self._state[consts.AZURE_DEVOPS_TOKEN_STRING][consts.AZURE_DEVOPS_REFRESH_TOKEN_STRING] = self.encrypt_state(
-                        self._refresh_token
-                    )
+                    token[consts.AZURE_DEVOPS_REFRESH_TOKEN_STRING] = self.encrypt_state(self._refresh_token)
 
-                if self._state.get("code"):
-                    self._state["code"] = self.encrypt_state(self._state["code"])
+                state[consts.AZURE_DEVOPS_TOKEN_STRING] = token
+
+                if state.get("code"):
+                    state["code"] = self.encrypt_state(state["code"])
         except Exception as e:
             self.error_print(f"{consts.AZURE_DEVOPS_ENCRYPTION_ERROR}: {self._get_error_message_from_exception(e)}")
             return self.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_ENCRYPTION_ERROR)
 
-        # Save the state, this data is saved across actions and app upgrades
-        self._state[consts.AZURE_DEVOPS_STATE_IS_ENCRYPTED] = True
-        self.save_state(self._state)
-        _save_app_state(self._state, self.get_asset_id(), self)
+        state[consts.AZURE_DEVOPS_STATE_IS_ENCRYPTED] = True
+        changed_keys = {key for key in state.keys() | saved_state.keys() if state.get(key) != saved_state.get(key)}
+
+        try:
+            with _asset_file_lock(self.get_asset_id(), consts.STATE_LOCK_FILE, self):
+                current_state = _load_app_state(self.get_asset_id(), self)
+                # A state that was not encrypted when loaded is saved whole, so no unencrypted token is kept
+                if current_state and was_encrypted:
+                    for key in changed_keys:
+                        if key in consts.STATE_MERGED_CACHES and isinstance(state.get(key), dict):
+                            current_state[key] = _merge_state_entries(current_state.get(key), saved_state.get(key), state[key])
+                        elif key in state:
+                            current_state[key] = state[key]
+                        else:
+                            current_state.pop(key, None)
+                    state = current_state
+
+                # The platform copy is loaded when an action starts, the REST handler and the merge read the app directory copy
+                self.save_state(state)
+                _save_app_state(state, self.get_asset_id(), self)
+        except AssetFileLockError as e:
+            self.error_print(f"{consts.AZURE_DEVOPS_STATE_LOCK_ERROR}: {self._get_error_message_from_exception(e)}")
+            return self.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_STATE_LOCK_ERROR)
+
+        # The decrypted tokens are kept in the token attributes, the state keeps their encrypted values
+        self._state = state
+        self._saved_state = copy.deepcopy(state)
         return phantom.APP_SUCCESS
 
+    def finalize(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+        self._close_work_item_cache()
+
+        ret_val = self._save_state()
+
+        if self._metrics_enabled:
+            self._export_metrics()
+
+        return ret_val
+
+    def _export_metrics(self):
+        """Add the requests, token refreshes and actions of this run to the metrics of the asset and write the metrics file.
+        The metrics are updated under the metrics lock, so the updates of the concurrent actions of the asset are all kept.
+        """
+        asset_id = self.get_asset_id()
+        data_file_path = _get_asset_file_path(asset_id, consts.METRICS_DATA_FILE, self)
+        metrics_file_path = _get_asset_file_path(asset_id, consts.METRICS_FILE, self)
+        if not data_file_path or not metrics_file_path:
+            return
+
+        asset_labels = {"asset": asset_id}
+        try:
+            with _asset_file_lock(asset_id, consts.METRICS_LOCK_FILE, self):
+                metrics = {}
+                try:
+                    with open(data_file_path) as data_file:
+                        metrics = json.load(data_file)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    # The counters restart from zero, Prometheus handles it like a restart of the exporter
+                    self.debug_print(f"Resetting the metrics, unable to read the metrics data file: {e!s}")
+
+                for request in self._metrics_requests:
+                    endpoint_labels = {**asset_labels, "method": request["method"], "endpoint": _get_metrics_endpoint(request["path"])}
+                    _update_metric(metrics, "azuredevops_requests_total", {**endpoint_labels, "status_code": request["status_code"] or "error"})
+                    _update_metric(metrics, "azuredevops_request_duration_seconds", endpoint_labels, request["elapsed_ms"] / 1000)
+                    _update_metric(metrics, "azuredevops_request_retries_total", asset_labels, request["retries"])
+                    _update_metric(metrics, "azuredevops_throttled_responses_total", asset_labels, request["throttled"])
+                    _update_metric(metrics, "azuredevops_sent_bytes_total", asset_labels, request["request_bytes"])
+                    _update_metric(metrics, "azuredevops_received_bytes_total", asset_labels, request["response_bytes"])
+
+                _update_metric(metrics, "azuredevops_token_refreshes_total", asset_labels, self._metrics_token_refreshes)
+
+                for action_id, status, duration in self._metrics_actions:
+                    _update_metric(metrics, "azuredevops_actions_total", {**asset_labels, "action": action_id, "status": status})
+                    _update_metric(metrics, "azuredevops_action_duration_seconds", {**asset_labels, "action": action_id}, duration)
+
+                _update_metric(metrics, "azuredevops_metrics_last_update_timestamp_seconds", asset_labels, int(time.time()))
+
+                _write_file_atomically(data_file_path, json.dumps(metrics))
+                _write_file_atomically(metrics_file_path, _render_metrics(metrics))
+        except Exception as e:
+            self.debug_print(f"Unable to export the metrics: {self._get_error_message_from_exception(e)}")
+            return
+
+        self._metrics_requests = []
+        self._metrics_token_refreshes = 0
+        self._metrics_actions = []
+
 
 def main():
     import argparse
@@ -14,6 +14,14 @@
 # and limitations under the License.
 
 TC_FILE = "oauth_task.out"
+# Advisory lock files serializing the state file updates and the token requests of an asset
+STATE_LOCK_FILE = "state.lock"
+TOKEN_LOCK_FILE = "token.lock"
+# Seconds an action waits for another action of the asset to get a new token, the action fails if no new token was saved
+TOKEN_LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.1
+# Mode of a newly created state file, an existing state file keeps its mode
+STATE_FILE_MODE = 0o664
 
 # Microsoft Entra ID OAuth (New preferred method as of April 2025)
 ENTRA_ID_TOKEN_URL = "https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
@@ -40,12 +48,20 @@ AZURE_DEVOPS_OAUTH_URL_MESSAGE = "Using OAuth URL:\n"
 AZURE_DEVOPS_CODE_GENERATION_SCOPE = "vso.entitlements vso.memberentitlementmanagement_write vso.work_full"
 PERMISSION_CODE = "0664"
 AZURE_DEVOPS_TC_STATUS_SLEEP = 2
+AZURE_DEVOPS_DEFAULT_AUTHORIZATION_TIMEOUT = 90
+# inotify flags of the wait for the authorization status file
+INOTIFY_IN_CLOEXEC = 0o2000000
+INOTIFY_IN_CLOSE_WRITE = 0x00000008
+INOTIFY_IN_MOVED_TO = 0x00000080
 
 
 # For encryption and decryption
 AZURE_DEVOPS_ENCRYPT_TOKEN = "Encrypting the {} token"
 AZURE_DEVOPS_DECRYPT_TOKEN = "Decrypting the {} token"
 AZURE_DEVOPS_ENCRYPTION_ERROR = "Error occurred while encrypting the state file"
+AZURE_DEVOPS_STATE_LOCK_ERROR = "Unable to lock the asset state file"
+AZURE_DEVOPS_TOKEN_LOCK_ERROR = "Unable to lock the asset token requests"
+AZURE_DEVOPS_TOKEN_SAVE_ERROR = "Unable to save the new token in the asset state"
 AZURE_DEVOPS_DECRYPTION_ERROR = "Error occurred while decrypting the state file"
 AZURE_DEVOPS_STATE_IS_ENCRYPTED = "is_encrypted"
 
@@ -53,6 +69,10 @@ AZURE_DEVOPS_STATE_IS_ENCRYPTED = "is_encrypted"
 AZURE_DEVOPS_TOKEN_STRING = "token"
 AZURE_DEVOPS_ACCESS_TOKEN_STRING = "access_token"
 AZURE_DEVOPS_REFRESH_TOKEN_STRING = "refresh_token"
+AZURE_DEVOPS_EXPIRES_IN_STRING = "expires_in"
+AZURE_DEVOPS_EXPIRES_ON_STRING = "expires_on"
+# Refresh the access token this many seconds before it expires
+AZURE_DEVOPS_DEFAULT_TOKEN_EXPIRY_SKEW = 300
 
 JWT_BEARER_TOKEN = "urn:ietf:params:oauth:grant-type:jwt-bearer"
 
@@ -65,20 +85,167 @@ FORM_URLENCODED = "application/x-www-form-urlencoded"
 ITERATIONS = "/_apis/work/teamsettings/iterations"
 ITERATIONS_TEAM = "/{team}/_apis/work/teamsettings/iterations"
 WORK_ITEMS = "/_apis/wit/workitems"
+WORK_ITEMS_BATCH = "/_apis/wit/workitemsbatch"
+# Maximum number of ids accepted by a single workitemsbatch request
+WORK_ITEMS_BATCH_SIZE = 200
+WORK_ITEMS_BATCH_DEFAULT_WORKERS = 4
+WIQL = "/_apis/wit/wiql"
+WIQL_DEFAULT_TOP = 200
 COMMENTS = "/_apis/wit/workItems/{}/comments"
+ATTACHMENTS = "/_apis/wit/attachments"
 USER_ENTITLEMENTS = "/_apis/userentitlements"
 
+# search users output modes
+SEARCH_USERS_OUTPUT_ACTION_RESULT = "Action result"
+SEARCH_USERS_OUTPUT_VAULT = "Vault file"
+SEARCH_USERS_OUTPUT_MODES = [SEARCH_USERS_OUTPUT_ACTION_RESULT, SEARCH_USERS_OUTPUT_VAULT]
+SEARCH_USERS_VAULT_FILE_NAME = "azuredevops_users_{timestamp}.ndjson"
+
+# Bulk user entitlement changes are sent as JSON patch documents to the collection endpoint
+USER_ENTITLEMENTS_BATCH_API_VERSION = "7.1-preview.3"
+USER_ENTITLEMENTS_BATCH_SIZE = 100
+# The batch is processed asynchronously, its operation is polled until it completes or the timeout elapses
+OPERATIONS = "/_apis/operations"
+OPERATION_COMPLETED_STATUSES = ("succeeded", "failed", "cancelled")
+OPERATION_SUCCEEDED_STATUS = "succeeded"
+USER_ENTITLEMENTS_OPERATION_TIMEOUT = 60
+USER_ENTITLEMENTS_OPERATION_POLL_INTERVAL = 2
+
 PROJECT_BASE_URL = "https://dev.azure.com/{organization}/{project}"
 USER_ENTITLEMENT_URL = "https://vsaex.dev.azure.com/{organization}"
 TOKEN_URL = "https://app.vssps.visualstudio.com/oauth2/token"
 AUTHORIZATION_URL = "https://app.vssps.visualstudio.com/oauth2/authorize"
 GET_PROJECT_LIST_URL = "https://dev.azure.com/{organization}/_apis/projects"
+PROJECT_LIST_PAGE_SIZE = 500
+CONTINUATION_TOKEN_HEADER = "x-ms-continuationtoken"
+
+# Project name to id index kept in the asset state
+AZURE_DEVOPS_PROJECT_INDEX = "project_index"
+AZURE_DEVOPS_DEFAULT_PROJECT_CACHE_TTL = 3600
+
+# Iterations returned by list iterations, cached in the asset state per team and timeframe
+AZURE_DEVOPS_ITERATION_CACHE = "iteration_cache"
+AZURE_DEVOPS_DEFAULT_ITERATION_CACHE_TTL = 3600
+# Keys of the state holding caches, merged entry by entry with the state saved by concurrent actions
+STATE_MERGED_CACHES = (AZURE_DEVOPS_ITERATION_CACHE, AZURE_DEVOPS_PROJECT_INDEX)
+
+# Consts for on poll
+AZURE_DEVOPS_POLL_CHECKPOINT = "poll_checkpoint"
+AZURE_DEVOPS_DEFAULT_FIRST_POLL_DAYS = 7
+AZURE_DEVOPS_DEFAULT_POLL_MAX_WORK_ITEMS = 1000
+POLL_CHANGED_WORK_ITEMS_QUERY = (
+    "SELECT [System.Id] FROM WorkItems WHERE [System.TeamProject] = @project AND ([System.ChangedDate] > '{watermark}' "
+    "OR ([System.ChangedDate] = '{watermark}' AND [System.Id] > {last_id})) ORDER BY [System.ChangedDate] ASC, [System.Id] ASC"
+)
+WORK_ITEM_ARTIFACT_NAME = "Work Item Change"
+WORK_ITEM_ARTIFACT_LABEL = "work item"
 # Consts for error messages
 AZUREDEVOPS_ERROR_MESSAGE_UNAVAILABLE = "Error message unavailable. Please check the asset configuration and|or the action parameters."
-BAD_TOKEN_MATCH_STRING = "203"
+AZURE_DEVOPS_VALID_INT_MESSAGE = "Please provide a valid integer value in the '{param}' parameter"
+AZURE_DEVOPS_NON_NEG_INT_MESSAGE = "Please provide a valid non-negative integer value in the '{param}' parameter"
+AZURE_DEVOPS_NON_NEG_NON_ZERO_INT_MESSAGE = "Please provide a valid non-zero positive integer value in the '{param}' parameter"
+AZURE_DEVOPS_VALUE_LIST_MESSAGE = "Please provide a valid value in the '{param}' parameter. Valid values are: {values}"
+# Azure DevOps answers an expired or invalid bearer token with a 203 sign-in page or a 401
+BAD_TOKEN_STATUS_CODES = (203, 401)
 APPLICATION_JSON_PATCH_HEADER = "application/json-patch+json"
 OCTANT_HEADER_STRING = "application/octet-stream"
 
+# add attachment chunked upload, the chunk size is configured in MB
+BYTES_IN_MB = 1024 * 1024
+ADD_ATTACHMENT_DEFAULT_CHUNK_SIZE = 4
+ADD_ATTACHMENT_CHUNK_RETRIES = 3
+ADD_ATTACHMENT_CHUNK_RETRY_WAIT = 2
+ADD_ATTACHMENTS_DEFAULT_WORKERS = 4
+
+# Retry policy for throttled and unavailable responses
+AZURE_DEVOPS_RETRY_STATUS_CODES = (429, 502, 503, 504)
+AZURE_DEVOPS_IDEMPOTENT_METHODS = ("get", "head", "options", "put", "delete")
+AZURE_DEVOPS_MAX_RETRIES = 5
+AZURE_DEVOPS_RETRY_BACKOFF_BASE = 1
+AZURE_DEVOPS_RETRY_BACKOFF_MAX = 30
+# Upper limit of the time an action spends waiting between retries, in seconds
+AZURE_DEVOPS_DEFAULT_MAX_RETRY_WAIT = 60
+AZURE_DEVOPS_RATE_LIMIT_HEADERS = (
+    "Retry-After",
+    "X-RateLimit-Resource",
+    "X-RateLimit-Delay",
+    "X-RateLimit-Limit",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Reset",
+)
+
+# Client-side request rate shared by all the actions of an asset
+RATE_LIMIT_FILE = "rate_limit.json"
+AZURE_DEVOPS_DEFAULT_RATE_LIMIT = 0
+# Number of seconds worth of requests that can be sent in a burst
+AZURE_DEVOPS_RATE_LIMIT_BURST_SECONDS = 2
+# Lowest fraction of the configured rate the limiter slows down to when the service reports a low remaining budget
+AZURE_DEVOPS_RATE_LIMIT_MIN_FACTOR = 0.1
+# Fraction of the configured rate recovered after every response without throttling
+AZURE_DEVOPS_RATE_LIMIT_RECOVERY_STEP = 0.1
+
+# Capture of the responses in the debug data of the action result
+DEBUG_CAPTURE_ALWAYS = "Always"
+DEBUG_CAPTURE_ON_FAILURE = "On failure"
+DEBUG_CAPTURE_NEVER = "Never"
+DEBUG_CAPTURE_MODES = [DEBUG_CAPTURE_ON_FAILURE, DEBUG_CAPTURE_ALWAYS, DEBUG_CAPTURE_NEVER]
+AZURE_DEVOPS_DEFAULT_DEBUG_MAX_BYTES = 4096
+
+# Prometheus textfile collector metrics of an asset, the values are kept in the JSON file and rendered to the .prom file
+METRICS_FILE = "metrics.prom"
+METRICS_DATA_FILE = "metrics.json"
+METRICS_LOCK_FILE = "metrics.lock"
+# Upper bounds in seconds of the buckets of the duration histograms
+METRICS_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Path segments the endpoint label starts at, the organization, project and tenant before them are dropped
+METRICS_ENDPOINT_ROOTS = ("_apis", "oauth2")
+METRICS_ID_PATTERN = r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$"
+METRICS_COUNTER = "counter"
+METRICS_GAUGE = "gauge"
+METRICS_HISTOGRAM = "histogram"
+# Metric name to type and help text
+METRICS_DESCRIPTIONS = {
+    "azuredevops_requests_total": (METRICS_COUNTER, "Requests sent to Azure DevOps, by endpoint and final status code"),
+    "azuredevops_request_duration_seconds": (METRICS_HISTOGRAM, "Duration of the requests, including their retries and waits"),
+    "azuredevops_request_retries_total": (METRICS_COUNTER, "Requests sent again after a connection error or a retryable status code"),
+    "azuredevops_throttled_responses_total": (METRICS_COUNTER, "Responses with the 429 status code"),
+    "azuredevops_token_refreshes_total": (METRICS_COUNTER, "Access tokens requested by the actions"),
+    "azuredevops_sent_bytes_total": (METRICS_COUNTER, "Bytes of the request bodies sent"),
+    "azuredevops_received_bytes_total": (METRICS_COUNTER, "Bytes of the response bodies received"),
+    "azuredevops_actions_total": (METRICS_COUNTER, "Actions run, by action and status"),
+    "azuredevops_action_duration_seconds": (METRICS_HISTOGRAM, "Duration of the actions, for every parameter"),
+    "azuredevops_metrics_last_update_timestamp_seconds": (METRICS_GAUGE, "Time of the last update of the metrics"),
+}
+
+# Profiling of the action runs, the reports are written next to the asset state
+PROFILE_MODE_OFF = "Off"
+PROFILE_MODE_CPU = "CPU"
+PROFILE_MODE_MEMORY = "Memory"
+PROFILE_MODE_CPU_AND_MEMORY = "CPU and memory"
+PROFILE_MODES = [PROFILE_MODE_OFF, PROFILE_MODE_CPU, PROFILE_MODE_MEMORY, PROFILE_MODE_CPU_AND_MEMORY]
+PROFILE_FILE_PREFIX = "profile_"
+# Number of functions and allocation sites in the debug output, the memory report lists more of them
+PROFILE_TOP_N = 20
+PROFILE_REPORT_TOP_N = 100
+# Frames kept for every allocation, the report groups the allocations by their innermost frame
+PROFILE_TRACEMALLOC_FRAMES = 1
+# Profiled runs kept per asset, the report files of the oldest runs are removed
+PROFILE_MAX_RUNS = 20
+
+# On-disk cache of the get work item responses
+WORK_ITEM_CACHE_FILE = "work_item_cache.db"
+WORK_ITEM_CACHE_DEFAULT_TTL = 60
+WORK_ITEM_CACHE_DEFAULT_MAX_ITEMS = 1000
+# Seconds to wait for another action holding the cache database lock
+WORK_ITEM_CACHE_LOCK_TIMEOUT = 5
+WORK_ITEM_CACHE_HIT = "hit"
+WORK_ITEM_CACHE_REVALIDATED = "revalidated"
+WORK_ITEM_CACHE_MISS = "miss"
+
+# HTTP connection pooling
+AZURE_DEVOPS_POOL_CONNECTIONS = 5
+AZURE_DEVOPS_POOL_MAXSIZE = 10
+
 # Authentication types
 AUTH_TYPE_BASIC = "Basic Auth"
 AUTH_TYPE_INTERACTIVE_LEGACY = "Interactive Auth (Legacy)"
@@ -0,0 +1,297 @@
+# File: bench_actions.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""End-to-end benchmark of the connector actions against a local Azure DevOps stand-in.
+
+Every run goes through BaseConnector._handle_action, like main() does, so initialize, the action handler and
+finalize are all measured. Run it with the Python interpreter of the app, from any directory:
+
+    python benchmarks/bench_actions.py [--scenarios get_work_item,search_users] [--runs 20] [--latency-ms 50]
+        [--pages 5] [--page-size 100] [--throttle-rate 0.05] [--payload-kb 4] [--work-items 400] [--output results.json]
+
+Every scenario runs in its own process and the stand-in in another one, so the reported peak RSS belongs to the
+connector running that scenario only. The latency percentiles are computed over the runs, the requests per action
+include the retried and the token requests.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from urllib.request import urlopen
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCHMARKS_DIR)
+MOCK_SCRIPT = os.path.join(BENCHMARKS_DIR, "mock_azure_devops.py")
+
+# Scenario name to action identifier and a function building the action parameters from the options
+SCENARIOS = {
+    "get_work_item": ("get_work_item", lambda options: {"work_item_id": 1, "expand": "None"}),
+    "get_work_items": (
+        "get_work_items",
+        lambda options: {"work_item_ids": ",".join(str(index) for index in range(1, options.work_items + 1)), "expand": "None"},
+    ),
+    "query_work_items": (
+        "query_work_items",
+        lambda options: {"query": "SELECT [System.Id] FROM WorkItems", "top": options.work_items, "expand": "None"},
+    ),
+    "add_work_item": (
+        "add_work_item",
+        lambda options: {"work_item_type": "Bug", "post_body": json.dumps({"System.Title": "Benchmark", "System.Description": "Benchmark"})},
+    ),
+    "add_comment": ("add_comment", lambda options: {"work_item_id": 1, "comment": "Benchmark"}),
+    "list_iterations": ("list_iterations", lambda options: {"force_refresh": True}),
+    "search_users": ("search_users", lambda options: {}),
+    "add_user": (
+        "add_user",
+        lambda options: {
+            "user_email": "user@example.com",
+            "account_license_type": "express",
+            "group_type": "projectReader",
+            "project_name": "bench",
+        },
+    ),
+}
+
+
+def percentile(values, percent):
+    """Get a percentile of the values with the nearest-rank method.
+
+    :param values: list of numbers
+    :param percent: percentile between 0 and 100
+    :return: value at the percentile
+    """
+    ordered = sorted(values)
+    rank = max(1, round(percent / 100 * len(ordered) + 0.5))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def get_config(options):
+    config = {
+        "organization": "bench",
+        "project": "bench",
+        "api version": "7.1",
+        # The client-side rate limit is disabled unless requested, it would hide the cost of the connector itself
+        "rate_limit": options.rate_limit,
+        "project_cache_ttl": 0,
+        "iteration_cache_ttl": 0,
+    }
+    if options.auth == "basic":
+        config.update({"auth_type": "Basic Auth", "username": "bench", "access token": "bench"})
+    else:
+        # Every token is considered about to expire, so a new token is requested before every request
+        config.update({"auth_type": "Interactive Auth (Legacy)", "client_id": "bench", "client_secret": "bench", "token_expiry_skew": 10**9})
+    return config
+
+
+def start_mock(options):
+    """Start a stand-in in its own process.
+
+    :param options: parsed command line options
+    :return: stand-in process, base URL of the stand-in
+    """
+    mock_process = subprocess.Popen(
+        [
+            sys.executable,
+            MOCK_SCRIPT,
+            f"--latency={options.latency_ms / 1000}",
+            f"--pages={options.pages}",
+            f"--page-size={options.page_size}",
+            f"--throttle-rate={options.throttle_rate}",
+            f"--payload-kb={options.payload_kb}",
+            f"--work-items={options.work_items}",
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    base_url = mock_process.stdout.readline().strip()
+    if not base_url:
+        mock_process.wait()
+        raise RuntimeError(f"The stand-in exited with status {mock_process.returncode}")
+    return mock_process, base_url
+
+
+def get_mock_stats(base_url):
+    """Get the request counters of a stand-in.
+
+    :param base_url: base URL of the stand-in
+    :return: dictionary of the number of requests and of throttled requests
+    """
+    from mock_azure_devops import STATS_PATH
+
+    with urlopen(f"{base_url}{STATS_PATH}") as response:
+        return json.load(response)
+
+
+def run_scenario(name, options):
+    """Run the action of a scenario against a new stand-in.
+
+    :param name: scenario name
+    :param options: parsed command line options
+    :return: dictionary of the scenario results
+    """
+    sys.path.insert(0, APP_DIR)
+    sys.path.insert(0, BENCHMARKS_DIR)
+
+    from mock_azure_devops import get_connector_urls
+
+    import azuredevops_consts as consts
+
+    mock_process, base_url = start_mock(options)
+    for constant, url in get_connector_urls(base_url).items():
+        setattr(consts, constant, url)
+
+    from azuredevops_connector import AzureDevopsConnector
+
+    identifier, get_parameters = SCENARIOS[name]
+    asset_id = f"bench{os.getpid()}"
+    in_json = {
+        "action": identifier.replace("_", " "),
+        "identifier": identifier,
+        "asset_id": asset_id,
+        "config": get_config(options),
+        "parameters": [get_parameters(options)],
+        "environment_variables": {},
+    }
+
+    latencies = []
+    requests_per_action = []
+    failures = 0
+    throttled = 0
+    try:
+        for run in range(options.warmup + options.runs):
+            stats = get_mock_stats(base_url)
+            connector = AzureDevopsConnector()
+            start = time.perf_counter()
+            connector._handle_action(json.dumps(in_json), None)
+            elapsed = time.perf_counter() - start
+
+            # The warmup runs absorb the first use costs, such as the lazy imports
+            if run < options.warmup:
+                continue
+
+            latencies.append(elapsed * 1000)
+            run_stats = get_mock_stats(base_url)
+            requests_per_action.append(run_stats["requests"] - stats["requests"])
+            throttled += run_stats["throttled"] - stats["throttled"]
+
+            action_results = connector.get_action_results()
+            if not action_results or not all(action_result.get_status() for action_result in action_results):
+                failures += 1
+    finally:
+        mock_process.stdin.close()
+        mock_process.wait()
+        for file_path in glob.glob(os.path.join(APP_DIR, f"{asset_id}_*")):
+            os.remove(file_path)
+
+    return {
+        "action": identifier,
+        "runs": len(latencies),
+        "failures": failures,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+            "mean": statistics.mean(latencies),
+        },
+        "requests_per_action": statistics.mean(requests_per_action),
+        "throttled_requests": throttled,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def parse_args(argv=None):
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated scenarios, from: {', '.join(SCENARIOS)}")
+    argparser.add_argument("--runs", type=int, default=20, help="measured runs per scenario")
+    argparser.add_argument("--warmup", type=int, default=2, help="runs per scenario before the measured runs")
+    argparser.add_argument("--latency-ms", type=float, default=0, help="latency added by the stand-in to every request")
+    argparser.add_argument("--pages", type=int, default=1, help="pages returned by the paginated APIs")
+    argparser.add_argument("--page-size", type=int, default=100, help="items in every page of the paginated APIs")
+    argparser.add_argument("--throttle-rate", type=float, default=0, help="share of the requests answered with a 429")
+    argparser.add_argument("--payload-kb", type=int, default=1, help="size of the description of every work item")
+    argparser.add_argument("--work-items", type=int, default=200, help="work items requested by the work item scenarios")
+    argparser.add_argument("--rate-limit", type=int, default=0, help="rate_limit asset setting, 0 disables the client-side rate limit")
+    argparser.add_argument(
+        "--auth", choices=["basic", "interactive"], default="basic", help="interactive runs request a new token before every request"
+    )
+    argparser.add_argument("--output", help="write the results to this JSON file")
+    argparser.add_argument("--child", help=argparse.SUPPRESS)
+    return argparser.parse_args(argv)
+
+
+def main():
+    options = parse_args()
+
+    if options.child:
+        print(json.dumps(run_scenario(options.child, options)))
+        return 0
+
+    scenarios = [name.strip() for name in options.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(unknown)}")
+        return 2
+
+    results = {}
+    print(f"{'scenario':<18} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/act':>8} {'429s':>6} {'fail':>5} {'rss MB':>8}")
+    for name in scenarios:
+        # Every scenario runs in its own process so the peak RSS is not carried over between scenarios
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--child", name],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if child.returncode != 0:
+            print(f"{name:<18} failed:\n{child.stderr}")
+            results[name] = {"error": child.stderr}
+            continue
+
+        result = results[name] = json.loads(child.stdout.splitlines()[-1])
+        latency = result["latency_ms"]
+        print(
+            f"{name:<18} {latency['p50']:>9.1f} {latency['p90']:>9.1f} {latency['p99']:>9.1f} {latency['max']:>9.1f} "
+            f"{result['requests_per_action']:>8.1f} {result['throttled_requests']:>6} {result['failures']:>5} {result['peak_rss_mb']:>8.1f}"
+        )
+
+    if options.output:
+        with open(options.output, "w") as output_file:
+            json.dump(
+                {
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "python": platform.python_version(),
+                    "options": {key: value for key, value in vars(options).items() if key != "child"},
+                    "results": results,
+                },
+                output_file,
+                indent=4,
+            )
+        print(f"Results written to {options.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+# File: bench_local.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Microbenchmarks of the local work done by every action: state file I/O, token encryption, response processing
+and work item shaping.
+
+Run it with the Python interpreter of the app, from any directory:
+
+    python benchmarks/bench_local.py [--filter state] [--repeat 5] [--output results.json] [--compare baseline.json]
+
+Every case is measured on synthetic data of several sizes. The number of calls per repeat is calibrated so a
+repeat takes about --min-time seconds, the median and the minimum time per call over the repeats are reported.
+The results written with --output can be given to --compare when running another version of the app.
+"""
+
+import argparse
+import copy
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# Sizes of the synthetic state files, JSON response bodies and tokens, in KB
+STATE_SIZES_KB = (1, 64, 1024)
+RESPONSE_SIZES_KB = (1, 64, 1024)
+TOKEN_SIZES_KB = (1, 4)
+
+# Number of fields of the synthetic work items
+WORK_ITEM_FIELD_COUNTS = (20, 100, 400)
+
+# Calls per repeat are capped so the cheapest cases do not build huge input lists
+MAX_NUMBER = 10000
+
+
+def measure(function, make_input, repeat, min_time):
+    """Measure the time per call of a function.
+    The inputs are built before every repeat, outside of the measured time, so a function changing its input
+    in place gets a fresh one on every call.
+
+    :param function: function called with the input
+    :param make_input: function returning a new input
+    :param repeat: number of repeats
+    :param min_time: approximate duration of a repeat in seconds
+    :return: dictionary of the median and minimum time per call in microseconds and of the calls per repeat
+    """
+    item = make_input()
+    start = time.perf_counter()
+    function(item)
+    elapsed = max(time.perf_counter() - start, 1e-7)
+    number = max(1, min(MAX_NUMBER, int(min_time / elapsed)))
+
+    per_call = []
+    for _ in range(repeat):
+        inputs = [make_input() for _ in range(number)]
+        start = time.perf_counter()
+        for item in inputs:
+            function(item)
+        per_call.append((time.perf_counter() - start) / number * 1e6)
+
+    return {"median_us": statistics.median(per_call), "min_us": min(per_call), "number": number}
+
+
+def make_state(size_kb):
+    """Build an asset state of about the given JSON size, with the tokens and the caches kept by the actions.
+
+    :param size_kb: size of the state in KB
+    :return: state dictionary
+    """
+    state = {
+        "app_version": "1.0.0",
+        "is_encrypted": True,
+        "token": {"access_token": "a" * 1400, "refresh_token": "r" * 700, "expires_in": "3599", "expires_on": 1735693200},
+        "iteration_cache": {},
+    }
+    entry_size = len(json.dumps(make_iteration_cache_entry(0))) + len('"team00000000|current": , ')
+    for index in range(max(0, size_kb * 1024 - len(json.dumps(state))) // entry_size + 1):
+        state["iteration_cache"][f"team{index:08d}|current"] = make_iteration_cache_entry(index)
+    return state
+
+
+def make_iteration_cache_entry(index):
+    """Build an iteration cache entry as saved by the list iterations action.
+
+    :param index: index of the entry
+    :return: dictionary of the cache time and the cached response
+    """
+    iterations = [{"id": f"{index:08d}-0000-0000-0000-{sprint:012d}", "name": f"Sprint {sprint}"} for sprint in range(5)]
+    return {"updated_at": 1735689600 + index, "response": {"count": len(iterations), "value": iterations}}
+
+
+def make_response(size_kb, status_code=200):
+    """Build a JSON response of about the given body size.
+
+    :param size_kb: size of the body in KB
+    :param status_code: status code of the response
+    :return: requests.Response object
+    """
+    import requests
+
+    work_item_size = len(json.dumps(make_work_item(20)))
+    work_items = [make_work_item(20, work_item_id) for work_item_id in range(1, size_kb * 1024 // work_item_size + 2)]
+    body = json.dumps({"count": len(work_items), "value": work_items}).encode()
+
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers["Content-Type"] = "application/json; charset=utf-8"
+    response.encoding = "utf-8"
+    response._content = body
+    return response
+
+
+def make_work_item(field_count, work_item_id=1):
+    """Build a work item as returned by the API, with identity fields and dotted field reference names.
+
+    :param field_count: number of fields
+    :param work_item_id: id of the work item
+    :return: work item dictionary
+    """
+    url = f"https://dev.azure.com/bench/_apis/wit/workItems/{work_item_id}"
+    fields = {
+        "System.Id": work_item_id,
+        "System.Title": f"Work item {work_item_id}",
+        "System.State": "New",
+        "System.AssignedTo": {"displayName": "User", "uniqueName": "user@example.com", "url": url, "_links": {"avatar": {"href": url}}},
+        "System.Description": "<div>Description</div>",
+    }
+    for index in range(len(fields), field_count):
+        fields[f"Custom.Field{index}"] = f"Value {index}"
+    return {"id": work_item_id, "rev": 1, "fields": fields, "_links": {"self": {"href": url}}, "url": url}
+
+
+def bench_state(connector_module):
+    asset_id = f"bench{os.getpid()}"
+    try:
+        for size_kb in STATE_SIZES_KB:
+            state = make_state(size_kb)
+            # The state file is written before the cases so the load case reads a state of this size on its own too
+            connector_module._save_app_state(state, asset_id, None)
+            yield f"state/save_app_state/{size_kb}KB", lambda item: connector_module._save_app_state(item, asset_id, None), lambda: state
+            yield f"state/load_app_state/{size_kb}KB", lambda item: connector_module._load_app_state(asset_id), lambda: None
+    finally:
+        for file_path in glob.glob(os.path.join(APP_DIR, f"{asset_id}_*")):
+            os.remove(file_path)
+
+
+def bench_encryption(connector_module):
+    import encryption_helper
+
+    asset_id = "bench"
+    for size_kb in TOKEN_SIZES_KB:
+        token = "t" * (size_kb * 1024)
+        encrypted_token = encryption_helper.encrypt(token, asset_id)
+        yield f"encryption/encrypt/{size_kb}KB", lambda item: encryption_helper.encrypt(item, asset_id), lambda: token
+        yield f"encryption/decrypt/{size_kb}KB", lambda item: encryption_helper.decrypt(item, asset_id), lambda: encrypted_token
+
+
+def bench_process_response(connector_module):
+    from phantom.action_result import ActionResult
+
+    import azuredevops_consts as consts
+
+    connector = connector_module.AzureDevopsConnector()
+    connector._debug_max_bytes = consts.AZURE_DEVOPS_DEFAULT_DEBUG_MAX_BYTES
+
+    cases = [(mode, 200) for mode in consts.DEBUG_CAPTURE_MODES] + [(consts.DEBUG_CAPTURE_ON_FAILURE, 400)]
+    for size_kb in RESPONSE_SIZES_KB:
+        for debug_capture, status_code in cases:
+            response = make_response(size_kb, status_code)
+
+            def process_response(item, debug_capture=debug_capture, response=response):
+                connector._debug_capture = debug_capture
+                connector._process_response(response, item)
+
+            capture = debug_capture.lower().replace(" ", "_")
+            yield f"process_response/{status_code}/{capture}/{size_kb}KB", process_response, lambda: ActionResult({})
+
+
+def bench_shape_work_item(connector_module):
+    connector = connector_module.AzureDevopsConnector()
+
+    variants = {
+        "all_fields": {},
+        "output_fields": {"output_fields": {"system-id", "system-title", "system-state", "system-assignedto", "custom-field10"}},
+        "strip_links": {"strip_links": True},
+    }
+    for field_count in WORK_ITEM_FIELD_COUNTS:
+        work_item = make_work_item(field_count)
+        for variant, kwargs in variants.items():
+            yield (
+                f"shape_work_item/{variant}/{field_count}_fields",
+                lambda item, kwargs=kwargs: connector._shape_work_item(item, **kwargs),
+                lambda work_item=work_item: copy.deepcopy(work_item),
+            )
+
+
+BENCHMARKS = {
+    "state": bench_state,
+    "encryption": bench_encryption,
+    "process_response": bench_process_response,
+    "shape_work_item": bench_shape_work_item,
+}
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument("--filter", help="only run the cases whose name contains this string")
+    argparser.add_argument("--repeat", type=int, default=5, help="number of measured repeats per case")
+    argparser.add_argument("--min-time", type=float, default=0.2, help="approximate duration of a repeat in seconds")
+    argparser.add_argument("--output", help="write the results to this JSON file")
+    argparser.add_argument("--compare", help="JSON file written by --output, the change of the median is reported")
+    args = argparser.parse_args()
+
+    sys.path.insert(0, APP_DIR)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file).get("results", {})
+
+    results = {}
+    print(f"{'case':<48} {'median us':>12} {'min us':>12} {'calls':>7} {'change':>8}")
+    for group, benchmark in BENCHMARKS.items():
+        try:
+            import azuredevops_connector
+
+            for name, function, make_input in benchmark(azuredevops_connector):
+                if args.filter and args.filter not in name:
+                    continue
+                result = results[name] = measure(function, make_input, args.repeat, args.min_time)
+
+                change = ""
+                if name in baseline and baseline[name]["median_us"]:
+                    change = f"{(result['median_us'] / baseline[name]['median_us'] - 1) * 100:+.1f}%"
+                print(f"{name:<48} {result['median_us']:>12.2f} {result['min_us']:>12.2f} {result['number']:>7} {change:>8}")
+        except ImportError as e:
+            # encryption_helper and phantom are provided by the platform
+            print(f"{group:<48} skipped: {e!s}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "python": platform.python_version(),
+                    "options": {"repeat": args.repeat, "min_time": args.min_time, "filter": args.filter},
+                    "results": results,
+                },
+                output_file,
+                indent=4,
+            )
+        print(f"Results written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
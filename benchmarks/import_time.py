@@ -0,0 +1,132 @@
+# File: import_time.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Measure the import time of the connector and check that the deferred imports stay out of the action startup.
+
+Run it on a SOAR instance with the Python interpreter of the app, from any directory:
+
+    python benchmarks/import_time.py [--runs 5] [--max-ms 500]
+
+The connector imports the phantom and encryption_helper modules provided by the platform, and their import is part
+of the measured time. The script does not replace them, it exits with status 2 when they cannot be imported.
+The exit status is 1 when a deferred module is imported with the connector, or when the median import time
+is above --max-ms.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only needed by the HTML error path and the REST handler, importing the connector must not load them
+DEFERRED_MODULES = ("bs4", "django")
+
+CONNECTOR_MODULE = "azuredevops_connector"
+
+# Modules provided by the platform and not installed with the app
+PLATFORM_MODULES = ("phantom.base_connector", "encryption_helper")
+
+IMPORT_SCRIPT = f"import json, sys; import {CONNECTOR_MODULE}; print(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}})))"
+
+
+def get_missing_platform_modules():
+    """Check that the platform modules can be imported by the interpreter running the connector.
+
+    :return: names of the platform modules that cannot be imported
+    """
+    missing_modules = []
+    for name in PLATFORM_MODULES:
+        result = subprocess.run([sys.executable, "-c", f"import {name}"], cwd=APP_DIR, capture_output=True, check=False)
+        if result.returncode != 0:
+            missing_modules.append(name)
+    return missing_modules
+
+
+def measure_import():
+    """Import the connector in a new interpreter.
+
+    :return: top-level modules loaded by the import, dictionary of the cumulative import time in microseconds per module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Unable to import {CONNECTOR_MODULE}:\n{result.stderr}")
+
+    modules = json.loads(result.stdout.splitlines()[-1])
+
+    cumulative_times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            cumulative_times[name.strip()] = int(cumulative)
+
+    return modules, cumulative_times
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument("--runs", type=int, default=5, help="number of imports measured, the median is reported")
+    argparser.add_argument("--max-ms", type=float, help="fail if the median import time is above this number of milliseconds")
+    argparser.add_argument("--top", type=int, default=10, help="number of slowest top-level imports listed")
+    args = argparser.parse_args()
+
+    missing_modules = get_missing_platform_modules()
+    if missing_modules:
+        print(f"Unable to import the platform module(s) {', '.join(missing_modules)} with {sys.executable}.")
+        print("Run this script on a SOAR instance with the Python interpreter of the app.")
+        return 2
+
+    print(f"Python {sys.executable}")
+    import_times = []
+    for _ in range(args.runs):
+        modules, cumulative_times = measure_import()
+        import_times.append(cumulative_times.get(CONNECTOR_MODULE, 0) / 1000)
+
+    median_ms = statistics.median(import_times)
+    print(f"{CONNECTOR_MODULE} import time: median {median_ms:.1f} ms, min {min(import_times):.1f} ms over {args.runs} run(s)")
+
+    print("Slowest top-level imports of the last run (cumulative ms):")
+    top_level_times = {name: value for name, value in cumulative_times.items() if "." not in name and name != CONNECTOR_MODULE}
+    for name, value in sorted(top_level_times.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {value / 1000:8.1f}  {name}")
+
+    failed = False
+
+    loaded_deferred_modules = [name for name in DEFERRED_MODULES if name in modules]
+    if loaded_deferred_modules:
+        print(f"FAIL: deferred module(s) imported with the connector: {', '.join(loaded_deferred_modules)}")
+        failed = True
+
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"FAIL: median import time {median_ms:.1f} ms is above {args.max_ms} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+# File: mock_azure_devops.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Local HTTP stand-in for dev.azure.com, vsaex.dev.azure.com and the token endpoints, used by the benchmarks.
+
+The responses follow the shape of the Azure DevOps REST API closely enough for the connector actions, not its
+content. The latency, the number of continuation pages, the share of throttled requests and the size of the work
+items are configurable.
+
+The benchmarks run it in its own process, so its memory and CPU are not counted with the connector:
+
+    python benchmarks/mock_azure_devops.py [--latency 0.05] [--pages 5] ...
+
+prints the base URL of the server on its first line and serves until its standard input is closed. The request
+counters are returned by GET /_stats, which is not counted.
+"""
+
+import argparse
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+# Path prefixes used by the connector URLs once pointed at the stand-in, see MockAzureDevOps.connector_urls
+USER_ENTITLEMENT_PREFIX = "/vsaex"
+
+# Path of the request counters, see MockAzureDevOps.stats
+STATS_PATH = "/_stats"
+
+
+class MockAzureDevOps:
+    """Azure DevOps stand-in running on a local port in a background thread.
+
+    :param latency: seconds waited before answering every request
+    :param pages: number of pages returned by the paginated APIs (user entitlements and projects)
+    :param page_size: number of items in every page
+    :param throttle_rate: share of the requests answered with a 429 and a Retry-After of 0 seconds
+    :param payload_kb: size in KB of the description of every work item
+    :param work_items: number of work items matched by a WIQL query
+    :param seed: seed of the throttling decisions, for reproducible runs
+    """
+
+    def __init__(self, latency=0.0, pages=1, page_size=100, throttle_rate=0.0, payload_kb=1, work_items=200, seed=0):
+        self.latency = latency
+        self.pages = pages
+        self.page_size = page_size
+        self.throttle_rate = throttle_rate
+        self.payload_kb = payload_kb
+        self.work_items = work_items
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._token_counter = 0
+        self.requests = Counter()
+        self.throttled = 0
+
+        self._routes = [
+            ("POST", re.compile(r"^/oauth2/token$"), self._token),
+            ("POST", re.compile(r"^/[^/]+/oauth2/v2\.0/token$"), self._token),
+            ("GET", re.compile(r"^/[^/]+/_apis/projects$"), self._list_projects),
+            ("GET", re.compile(rf"^{USER_ENTITLEMENT_PREFIX}/[^/]+/_apis/userentitlements$"), self._list_users),
+            ("POST", re.compile(rf"^{USER_ENTITLEMENT_PREFIX}/[^/]+/_apis/userentitlements$"), self._add_user),
+            ("PATCH", re.compile(rf"^{USER_ENTITLEMENT_PREFIX}/[^/]+/_apis/userentitlements$"), self._patch_users),
+            ("DELETE", re.compile(rf"^{USER_ENTITLEMENT_PREFIX}/[^/]+/_apis/userentitlements/[^/]+$"), self._delete_user),
+            ("GET", re.compile(r"^/[^/]+/[^/]+/_apis/wit/workitems/(\d+)$"), self._get_work_item),
+            ("POST", re.compile(r"^/[^/]+/[^/]+/_apis/wit/workitems/\$[^/]+$"), self._add_work_item),
+            ("POST", re.compile(r"^/[^/]+/[^/]+/_apis/wit/workitemsbatch$"), self._get_work_items_batch),
+            ("POST", re.compile(r"^/[^/]+/[^/]+/_apis/wit/wiql$"), self._run_query),
+            ("POST", re.compile(r"^/[^/]+/[^/]+/_apis/wit/workItems/(\d+)/comments$"), self._add_comment),
+            ("GET", re.compile(r"^/[^/]+/[^/]+(?:/[^/]+)?/_apis/work/teamsettings/iterations$"), self._list_iterations),
+        ]
+
+        self._server = None
+        self.base_url = None
+
+    def start(self):
+        """Start the server on a free local port.
+
+        :return: base URL of the server
+        """
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # The headers and the body are written separately, without this every response waits for a delayed ACK
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                mock._dispatch(self, "GET")
+
+            def do_POST(self):
+                mock._dispatch(self, "POST")
+
+            def do_PATCH(self):
+                mock._dispatch(self, "PATCH")
+
+            def do_DELETE(self):
+                mock._dispatch(self, "DELETE")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        return self.base_url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def connector_urls(self):
+        """Get the values of the URL constants of azuredevops_consts pointing at the stand-in.
+
+        :return: dictionary of constant name to URL
+        """
+        return get_connector_urls(self.base_url)
+
+    @property
+    def request_count(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def stats(self):
+        """Get the request counters.
+
+        :return: dictionary of the number of requests and of throttled requests
+        """
+        with self._lock:
+            return {"requests": sum(self.requests.values()), "throttled": self.throttled}
+
+    def _dispatch(self, handler, method):
+        path, _, query = handler.path.partition("?")
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+
+        if method == "GET" and path == STATS_PATH:
+            self._send(handler, 200, self.stats())
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.requests[f"{method} {path}"] += 1
+            throttle = self.throttle_rate and self._random.random() < self.throttle_rate and "token" not in path
+            if throttle:
+                self.throttled += 1
+
+        if throttle:
+            self._send(handler, 429, {"message": "Request was blocked due to exceeding usage of resource"}, {"Retry-After": "0"})
+            return
+
+        for route_method, pattern, route in self._routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                status, payload, headers = route(match, _parse_query(query), _parse_body(body))
+                self._send(handler, status, payload, headers)
+                return
+
+        self._send(handler, 404, {"message": f"No route for {method} {path}"})
+
+    def _send(self, handler, status, payload, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        handler.send_response(status)
+        if payload is not None:
+            handler.send_header("Content-Type", "application/json; charset=utf-8")
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _page(self, query):
+        """Get the index of the requested page and the continuation token of the next page, if any."""
+        page = int(query.get("continuationToken") or 0)
+        next_token = str(page + 1) if page + 1 < self.pages else None
+        return page, next_token
+
+    def _work_item(self, work_item_id):
+        return {
+            "id": work_item_id,
+            "rev": 1,
+            "url": f"{self.base_url}/_apis/wit/workItems/{work_item_id}",
+            "_links": {"self": {"href": f"{self.base_url}/_apis/wit/workItems/{work_item_id}"}},
+            "fields": {
+                "System.Id": work_item_id,
+                "System.WorkItemType": "Bug",
+                "System.Title": f"Work item {work_item_id}",
+                "System.State": "New",
+                "System.ChangedDate": "2025-01-01T00:00:00.000Z",
+                "System.Description": "<div>" + "x" * (self.payload_kb * 1024) + "</div>",
+            },
+        }
+
+    def _user(self, index):
+        return {
+            "id": f"00000000-0000-0000-0000-{index:012d}",
+            "user": {"principalName": f"user{index}@example.com", "displayName": f"User {index}", "mailAddress": f"user{index}@example.com"},
+            "accessLevel": {"accountLicenseType": "express", "licenseDisplayName": "Basic"},
+            "lastAccessedDate": "2025-01-01T00:00:00Z",
+        }
+
+    def _token(self, match, query, body):
+        with self._lock:
+            self._token_counter += 1
+            counter = self._token_counter
+        return 200, {"access_token": f"access-{counter}", "refresh_token": f"refresh-{counter}", "expires_in": "3599"}, None
+
+    def _list_projects(self, match, query, body):
+        page, next_token = self._page(query)
+        projects = [{"id": f"project-{page}-{index}", "name": f"Project {page}-{index}"} for index in range(self.page_size)]
+        if page == 0:
+            projects[0] = {"id": "project-bench", "name": "bench"}
+        headers = {"x-ms-continuationtoken": next_token} if next_token else None
+        return 200, {"count": len(projects), "value": projects}, headers
+
+    def _list_users(self, match, query, body):
+        page, next_token = self._page(query)
+        users = [self._user(page * self.page_size + index) for index in range(self.page_size)]
+        response = {"items": users, "members": users, "totalCount": self.pages * self.page_size}
+        if next_token:
+            response["continuationToken"] = next_token
+        return 200, response, None
+
+    def _add_user(self, match, query, body):
+        return 200, {"isSuccess": True, "userEntitlement": self._user(0), "operationResult": {"isSuccess": True}}, None
+
+    def _patch_users(self, match, query, body):
+        operations = body if isinstance(body, list) else []
+        results = [{"isSuccess": True, "result": self._user(index)} for index in range(len(operations))]
+        return 200, {"isSuccess": True, "results": results}, None
+
+    def _delete_user(self, match, query, body):
+        return 204, None, None
+
+    def _get_work_item(self, match, query, body):
+        return 200, self._work_item(int(match.group(1))), None
+
+    def _add_work_item(self, match, query, body):
+        return 200, self._work_item(1), None
+
+    def _get_work_items_batch(self, match, query, body):
+        return 200, {"count": len(body.get("ids", [])), "value": [self._work_item(work_item_id) for work_item_id in body.get("ids", [])]}, None
+
+    def _run_query(self, match, query, body):
+        top = int(query.get("$top") or self.work_items)
+        work_items = [{"id": work_item_id, "url": ""} for work_item_id in range(1, min(top, self.work_items) + 1)]
+        return 200, {"queryType": "flat", "asOf": "2025-01-01T00:00:00.000Z", "workItems": work_items}, None
+
+    def _add_comment(self, match, query, body):
+        return 200, {"id": 1, "workItemId": int(match.group(1)), "text": body.get("text", "")}, None
+
+    def _list_iterations(self, match, query, body):
+        iterations = [{"id": f"iteration-{index}", "name": f"Sprint {index}", "path": f"bench\\Sprint {index}"} for index in range(10)]
+        return 200, {"count": len(iterations), "value": iterations}, None
+
+
+def get_connector_urls(base_url):
+    """Get the values of the URL constants of azuredevops_consts pointing at a stand-in.
+
+    :param base_url: base URL of the stand-in
+    :return: dictionary of constant name to URL
+    """
+    return {
+        "PROJECT_BASE_URL": f"{base_url}/{{organization}}/{{project}}",
+        "USER_ENTITLEMENT_URL": f"{base_url}{USER_ENTITLEMENT_PREFIX}/{{organization}}",
+        "GET_PROJECT_LIST_URL": f"{base_url}/{{organization}}/_apis/projects",
+        "TOKEN_URL": f"{base_url}/oauth2/token",
+        "ENTRA_ID_TOKEN_URL": f"{base_url}/{{tenant_id}}/oauth2/v2.0/token",
+    }
+
+
+def _parse_query(query):
+    return dict(parse_qsl(query))
+
+
+def _parse_body(body):
+    try:
+        return json.loads(body) if body else {}
+    except ValueError:
+        return {}
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument("--latency", type=float, default=0, help="seconds waited before answering every request")
+    argparser.add_argument("--pages", type=int, default=1, help="pages returned by the paginated APIs")
+    argparser.add_argument("--page-size", type=int, default=100, help="items in every page of the paginated APIs")
+    argparser.add_argument("--throttle-rate", type=float, default=0, help="share of the requests answered with a 429")
+    argparser.add_argument("--payload-kb", type=int, default=1, help="size of the description of every work item")
+    argparser.add_argument("--work-items", type=int, default=200, help="work items matched by a WIQL query")
+    argparser.add_argument("--seed", type=int, default=0, help="seed of the throttling decisions")
+    args = argparser.parse_args()
+
+    mock = MockAzureDevOps(
+        latency=args.latency,
+        pages=args.pages,
+        page_size=args.page_size,
+        throttle_rate=args.throttle_rate,
+        payload_kb=args.payload_kb,
+        work_items=args.work_items,
+        seed=args.seed,
+    )
+    print(mock.start(), flush=True)
+
+    # The benchmark stops the server by closing the standard input, the server also stops if the benchmark dies
+    sys.stdin.read()
+    mock.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
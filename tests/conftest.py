@@ -0,0 +1,202 @@
+# File: conftest.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Fixtures of the connector unit tests.
+
+The phantom and encryption_helper modules are provided by the SOAR platform. The tests always replace them with
+the minimal fakes below, so they run with only the Python requirements of the app installed, on the platform too. No test sends a request,
+the REST calls of the connector are patched in the tests that make them.
+"""
+
+import copy
+import os
+import sys
+import types
+
+import pytest
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+ASSET_ID = "1"
+
+
+class FakeActionResult:
+    def __init__(self, param=None):
+        self._param = param or {}
+        self._data = []
+        self._summary = {}
+        self._debug_data = []
+        self._status = None
+        self._message = ""
+
+    def add_data(self, data):
+        self._data.append(data)
+
+    def get_data(self):
+        return self._data
+
+    def update_summary(self, summary):
+        self._summary.update(summary)
+        return self._summary
+
+    def get_summary(self):
+        return self._summary
+
+    def add_debug_data(self, debug_data):
+        self._debug_data.append(debug_data)
+
+    def get_debug_data(self):
+        return self._debug_data
+
+    def set_status(self, status, message=""):
+        self._status = status
+        self._message = str(message)
+        return status
+
+    def get_status(self):
+        return self._status
+
+    def get_message(self):
+        return self._message
+
+    def append_to_message(self, message):
+        self._message += message
+
+    def get_param(self):
+        return self._param
+
+
+class FakeBaseConnector:
+    def __init__(self):
+        self._action_results = []
+        self._status = True
+        self._status_message = ""
+        self.saved_states = []
+        self.saved_containers = []
+
+    def get_asset_id(self):
+        return ASSET_ID
+
+    def get_config(self):
+        return {}
+
+    def get_action_identifier(self):
+        return "test_action"
+
+    def get_app_json(self):
+        return {"app_version": "1.0.0"}
+
+    def load_state(self):
+        return {}
+
+    def save_state(self, state):
+        self.saved_states.append(state)
+
+    def save_containers(self, containers):
+        self.saved_containers.append(containers)
+        return True, "", []
+
+    def is_poll_now(self):
+        return False
+
+    def add_action_result(self, action_result):
+        self._action_results.append(action_result)
+        return action_result
+
+    def get_action_results(self):
+        return self._action_results
+
+    def set_status(self, status, message=""):
+        self._status = status
+        self._status_message = message
+        return status
+
+    def get_status(self):
+        return self._status
+
+    def get_status_message(self):
+        return self._status_message
+
+    def save_progress(self, *args, **kwargs):
+        pass
+
+    def send_progress(self, *args, **kwargs):
+        pass
+
+    def debug_print(self, *args, **kwargs):
+        pass
+
+    def error_print(self, *args, **kwargs):
+        pass
+
+
+def _install_fake_platform_modules():
+    phantom_module = types.ModuleType("phantom")
+    app_module = types.ModuleType("phantom.app")
+    app_module.APP_SUCCESS = True
+    app_module.APP_ERROR = False
+    app_module.is_fail = lambda value: not value
+    app_module.is_success = lambda value: bool(value)
+    action_result_module = types.ModuleType("phantom.action_result")
+    action_result_module.ActionResult = FakeActionResult
+    base_connector_module = types.ModuleType("phantom.base_connector")
+    base_connector_module.BaseConnector = FakeBaseConnector
+    rules_module = types.ModuleType("phantom.rules")
+    vault_module = types.ModuleType("phantom.vault")
+    vault_module.Vault = type("Vault", (), {})
+
+    # Reversible, so the tests can tell the encrypted values from the plain ones
+    encryption_helper_module = types.ModuleType("encryption_helper")
+    encryption_helper_module.encrypt = lambda value, key: f"encrypted:{value}"
+    encryption_helper_module.decrypt = lambda value, key: value.removeprefix("encrypted:")
+
+    for name, module in (
+        ("phantom", phantom_module),
+        ("phantom.app", app_module),
+        ("phantom.action_result", action_result_module),
+        ("phantom.base_connector", base_connector_module),
+        ("phantom.rules", rules_module),
+        ("phantom.vault", vault_module),
+        ("encryption_helper", encryption_helper_module),
+    ):
+        sys.modules[name] = module
+        if "." in name:
+            setattr(phantom_module, name.split(".", 1)[1], module)
+
+
+_install_fake_platform_modules()
+
+
+@pytest.fixture
+def connector_module(tmp_path, monkeypatch):
+    """The connector module, with the asset files written to a temporary app directory."""
+    import azuredevops_connector
+
+    monkeypatch.setattr(azuredevops_connector, "__file__", str(tmp_path / "azuredevops_connector.py"))
+    return azuredevops_connector
+
+
+@pytest.fixture
+def make_connector(connector_module):
+    """Build connectors of the same asset, as the concurrent actions of an asset would be."""
+
+    def make_connector(state=None):
+        connector = connector_module.AzureDevopsConnector()
+        connector._state = copy.deepcopy(state or {})
+        connector._saved_state = copy.deepcopy(state or {})
+        return connector
+
+    return make_connector
@@ -0,0 +1,104 @@
+# File: test_add_attachments.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import json
+
+import pytest
+
+import azuredevops_consts as consts
+
+
+class FakeAzureDevOps:
+    """Answers the attachment uploads and the work item update of the add attachments action."""
+
+    def __init__(self):
+        self.uploads = []
+        self.updates = []
+
+    def make_rest_call_helper(self, endpoint, action_result, method="get", data=None, params=None, headers=None, **kwargs):
+        if endpoint == consts.ATTACHMENTS:
+            self.uploads.append((params["fileName"], data))
+            return True, {"id": f"attachment-{params['fileName']}", "url": f"https://dev.azure.com/attachments/{params['fileName']}"}
+
+        if endpoint.startswith(consts.WORK_ITEMS) and method == "patch":
+            self.updates.append((endpoint, json.loads(data), headers))
+            return True, {"id": int(endpoint.rsplit("/", 1)[1]), "rev": 2}
+
+        raise AssertionError(f"Unexpected request to {endpoint}")
+
+
+@pytest.fixture
+def add_attachments(connector_module, make_connector, monkeypatch, tmp_path):
+    """Run the action over vault files, the vault IDs starting with 'missing' are not in the vault."""
+
+    def vault_info(vault_id):
+        if vault_id.startswith("missing"):
+            return False, "Not found", []
+        vault_path = tmp_path / f"{vault_id}.txt"
+        vault_path.write_text(f"content of {vault_id}")
+        return True, "Found", [{"path": str(vault_path), "name": f"{vault_id}.txt"}]
+
+    monkeypatch.setattr(connector_module.phantom_rules, "vault_info", vault_info, raising=False)
+
+    def add_attachments(param):
+        connector = make_connector()
+        connector._api_version = "7.1"
+        service = FakeAzureDevOps()
+        monkeypatch.setattr(connector, "_make_rest_call_helper", service.make_rest_call_helper)
+        ret_val = connector._handle_add_attachments(param)
+        return ret_val, connector.get_action_results()[0], service
+
+    return add_attachments
+
+
+def test_partial_upload_failure_is_reported_per_vault_id(add_attachments):
+    ret_val, action_result, service = add_attachments({"vault_ids": "first, missing1, second"})
+
+    assert ret_val
+    assert [(attachment["vault_id"], attachment["status"]) for attachment in action_result.get_data()] == [
+        ("first", "success"),
+        ("missing1", "failed"),
+        ("second", "success"),
+    ]
+    assert action_result.get_data()[1]["message"] == "Error occurred while fetching the vault information of the Vault ID: missing1"
+    assert action_result.get_summary() == {"total_files": 3, "uploaded_files": 2, "failed_files": 1}
+    assert sorted(service.uploads) == [("first.txt", b"content of first"), ("second.txt", b"content of second")]
+    assert service.updates == []
+
+
+def test_uploaded_attachments_are_linked_with_a_single_request(add_attachments):
+    ret_val, action_result, service = add_attachments({"vault_ids": "first,missing1,second", "work_item_id": 7, "comment": "Logs"})
+
+    assert ret_val
+    assert len(service.updates) == 1
+    endpoint, operations, headers = service.updates[0]
+    assert endpoint == f"{consts.WORK_ITEMS}/7"
+    assert headers == {"Content-Type": consts.APPLICATION_JSON_PATCH_HEADER}
+    assert operations == [
+        {
+            "op": "add",
+            "path": "/relations/-",
+            "value": {"rel": "AttachedFile", "url": f"https://dev.azure.com/attachments/{name}", "attributes": {"comment": "Logs"}},
+        }
+        for name in ("first.txt", "second.txt")
+    ]
+    assert action_result.get_summary()["work_item_rev"] == 2
+
+
+def test_nothing_is_linked_when_no_file_is_uploaded(add_attachments):
+    ret_val, action_result, service = add_attachments({"vault_ids": "missing1,missing2", "work_item_id": 7})
+
+    assert not ret_val
+    assert action_result.get_message() == "None of the files could be uploaded"
+    assert service.updates == []
@@ -0,0 +1,55 @@
+# File: test_concurrency.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import threading
+import time
+
+from conftest import FakeActionResult
+
+import azuredevops_consts as consts
+
+
+def test_run_concurrently_keeps_the_order_and_merges_the_debug_data(make_connector):
+    connector = make_connector()
+    action_result = FakeActionResult()
+    item_results = set()
+
+    def upload(item_result, item):
+        # Later items finish first
+        time.sleep((10 - item) / 1000)
+        item_results.add(id(item_result))
+        item_result.add_debug_data({"item": item})
+        return item * 2
+
+    assert connector._run_concurrently(action_result, upload, list(range(10)), 4) == [item * 2 for item in range(10)]
+    assert len(item_results) == 10
+    assert action_result.get_debug_data() == [{"item": item} for item in range(10)]
+
+
+def test_run_concurrently_caps_the_workers_at_the_connection_pool(make_connector):
+    connector = make_connector()
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def upload(item_result, item):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+
+    connector._run_concurrently(FakeActionResult(), upload, list(range(consts.AZURE_DEVOPS_POOL_MAXSIZE * 3)), 100)
+
+    assert 1 < running["max"] <= consts.AZURE_DEVOPS_POOL_MAXSIZE
@@ -0,0 +1,51 @@
+# File: test_list_iterations.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+from conftest import ASSET_ID
+
+import azuredevops_consts as consts
+
+
+STATE = {"is_encrypted": True, "token": {"access_token": "encrypted:old", "expires_on": 0}}
+ITERATIONS = {"count": 1, "value": [{"id": "iteration-1", "name": "Sprint 1"}]}
+
+
+def test_iterations_cached_during_a_token_refresh_are_saved(connector_module, make_connector, monkeypatch):
+    connector_module._save_app_state(STATE, ASSET_ID, None)
+    connector = make_connector(STATE)
+    connector._access_token = "old"
+    requests = []
+
+    def make_rest_call_helper(endpoint, action_result, **kwargs):
+        # The refreshed token is saved during the request, which replaces the state of the connector
+        requests.append(endpoint)
+        connector.update_state_from_response({"access_token": "new", "refresh_token": "refresh-new", "expires_in": "3599"})
+        assert connector._save_state()
+        return True, ITERATIONS
+
+    monkeypatch.setattr(connector, "_make_rest_call_helper", make_rest_call_helper)
+
+    assert connector._handle_list_iterations({"team": "team"})
+    assert connector.get_action_results()[-1].get_summary()["cache"] == "miss"
+    assert connector._save_state()
+
+    iteration_cache = connector_module._load_app_state(ASSET_ID)[consts.AZURE_DEVOPS_ITERATION_CACHE]
+    assert iteration_cache["team|"]["response"] == ITERATIONS
+
+    # The next run of the action is served from the cache
+    connector = make_connector(connector_module._load_app_state(ASSET_ID))
+    monkeypatch.setattr(connector, "_make_rest_call_helper", make_rest_call_helper)
+    assert connector._handle_list_iterations({"team": "team"})
+    assert connector.get_action_results()[-1].get_summary()["cache"] == "hit"
+    assert len(requests) == 1
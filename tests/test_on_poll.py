@@ -0,0 +1,124 @@
+# File: test_on_poll.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import copy
+import re
+
+import phantom.app as phantom
+import pytest
+
+import azuredevops_consts as consts
+
+
+SHARED_CHANGED_DATE = "2025-01-01T10:00:00.12Z"
+PAGE_SIZE = 10
+
+QUERY_CONDITION = re.compile(
+    r"\[System\.ChangedDate\] > '(?P<watermark>[^']+)' OR "
+    r"\(\[System\.ChangedDate\] = '(?P=watermark)' AND \[System\.Id\] > (?P<last_id>\d+)\)"
+)
+
+
+class FakeAzureDevOps:
+    """Answers the WIQL and workitemsbatch requests of the poll, evaluating the changed date condition of the query."""
+
+    def __init__(self, work_items, connector):
+        self.work_items = work_items
+        self.connector = connector
+        self.queries = []
+
+    def make_rest_call_helper(self, endpoint, action_result, method="get", json=None, params=None, **kwargs):
+        if endpoint == consts.WIQL:
+            self.queries.append(json["query"])
+            condition = QUERY_CONDITION.search(json["query"])
+            watermark, last_id = condition.group("watermark"), int(condition.group("last_id"))
+
+            def position(work_item):
+                return self.connector._normalize_changed_date(work_item["fields"]["System.ChangedDate"])[:23], work_item["id"]
+
+            matches = sorted(
+                (work_item for work_item in self.work_items.values() if position(work_item) > (watermark.rstrip("Z"), last_id)),
+                key=position,
+            )
+            return True, {"asOf": "2025-01-02T00:00:00Z", "workItems": [{"id": work_item["id"]} for work_item in matches][: params["$top"]]}
+
+        if endpoint == consts.WORK_ITEMS_BATCH:
+            return True, {"value": [copy.deepcopy(self.work_items[work_item_id]) for work_item_id in json["ids"]]}
+
+        raise AssertionError(f"Unexpected request to {endpoint}")
+
+
+@pytest.fixture
+def poll(make_connector, monkeypatch):
+    """Run scheduled polls over work items of which more than a page share one changed date."""
+    work_items = {}
+    for work_item_id in range(1, 31):
+        changed_date = SHARED_CHANGED_DATE if work_item_id <= 25 else f"2025-01-01T10:01:{work_item_id:02d}.5Z"
+        work_items[work_item_id] = {
+            "id": work_item_id,
+            "rev": 1,
+            "fields": {"System.ChangedDate": changed_date, "System.Title": f"Work item {work_item_id}"},
+        }
+
+    state = {}
+
+    def poll(save_state=lambda connector: True, succeeds=True):
+        connector = make_connector(state)
+        connector._poll_max_work_items = PAGE_SIZE
+        connector._first_poll_days = 3650
+        connector._save_state = lambda: save_state(connector)
+        service = FakeAzureDevOps(work_items, connector)
+        monkeypatch.setattr(connector, "_make_rest_call_helper", service.make_rest_call_helper)
+
+        assert connector._handle_on_poll({}) == succeeds
+        state.clear()
+        state.update(connector._state)
+        return connector, service
+
+    poll.state = state
+    return poll
+
+
+def ingested_ids(connector):
+    return [container["source_data_identifier"] for containers in connector.saved_containers for container in containers]
+
+
+def test_poll_pages_through_work_items_sharing_a_changed_date(poll):
+    connector, _ = poll()
+    assert ingested_ids(connector) == [str(work_item_id) for work_item_id in range(1, 11)]
+    assert poll.state[consts.AZURE_DEVOPS_POLL_CHECKPOINT]["last_id"] == 10
+
+    connector, service = poll()
+    assert ingested_ids(connector) == [str(work_item_id) for work_item_id in range(11, 21)]
+    assert "[System.ChangedDate] = '2025-01-01T10:00:00.120Z' AND [System.Id] > 10" in service.queries[0]
+
+    connector, _ = poll()
+    assert ingested_ids(connector) == [str(work_item_id) for work_item_id in range(21, 31)]
+    assert poll.state[consts.AZURE_DEVOPS_POLL_CHECKPOINT] == {
+        "watermark": "2025-01-01T10:01:30.500000Z",
+        "last_id": 30,
+        "last_rev": 1,
+    }
+
+    connector, _ = poll()
+    assert ingested_ids(connector) == []
+    assert connector.get_action_results()[0].get_summary() == {"total_containers": 0}
+
+
+def test_poll_reports_the_checkpoint_save_error(poll):
+    def save_state(connector):
+        return connector.set_status(phantom.APP_ERROR, consts.AZURE_DEVOPS_STATE_LOCK_ERROR)
+
+    connector, _ = poll(save_state, succeeds=False)
+    assert connector.get_action_results()[0].get_message() == consts.AZURE_DEVOPS_STATE_LOCK_ERROR
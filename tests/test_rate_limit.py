@@ -0,0 +1,121 @@
+# File: test_rate_limit.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import json
+
+import pytest
+import requests
+from conftest import ASSET_ID
+
+import azuredevops_consts as consts
+
+
+AZURE_DEVOPS_URL = "https://dev.azure.com/org/project/_apis/wit/workitems/1"
+RATE = 10
+
+
+@pytest.fixture
+def clock(connector_module, monkeypatch):
+    """Frozen time, the sleeps of the connector are recorded instead of waited."""
+    clock = {"now": 1735689600.0, "sleeps": []}
+    monkeypatch.setattr(connector_module.time, "time", lambda: clock["now"])
+    monkeypatch.setattr(connector_module.time, "sleep", clock["sleeps"].append)
+    return clock
+
+
+@pytest.fixture
+def make_limited_connector(make_connector):
+    def make_limited_connector():
+        connector = make_connector()
+        connector._request_rate = RATE
+        connector._rate_limited_hosts = {"dev.azure.com"}
+        return connector
+
+    return make_limited_connector
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = AZURE_DEVOPS_URL
+    response.headers.update(headers or {})
+    return response
+
+
+def read_bucket(tmp_path):
+    return json.loads((tmp_path / f"{ASSET_ID}_{consts.RATE_LIMIT_FILE}").read_text())
+
+
+def test_only_the_azure_devops_requests_are_limited(make_limited_connector, clock, tmp_path):
+    connector = make_limited_connector()
+    connector._wait_for_rate_limit("https://login.microsoftonline.com/tenant/oauth2/v2.0/token")
+    assert not (tmp_path / f"{ASSET_ID}_{consts.RATE_LIMIT_FILE}").exists()
+
+    connector._request_rate = 0
+    connector._wait_for_rate_limit(AZURE_DEVOPS_URL)
+    assert not (tmp_path / f"{ASSET_ID}_{consts.RATE_LIMIT_FILE}").exists()
+
+
+def test_the_bucket_is_shared_by_the_actions_of_the_asset(make_limited_connector, clock):
+    burst = int(RATE * consts.AZURE_DEVOPS_RATE_LIMIT_BURST_SECONDS)
+    connectors = [make_limited_connector() for _ in range(2)]
+
+    for index in range(burst):
+        connectors[index % 2]._wait_for_rate_limit(AZURE_DEVOPS_URL)
+    assert clock["sleeps"] == []
+
+    connectors[0]._wait_for_rate_limit(AZURE_DEVOPS_URL)
+    connectors[1]._wait_for_rate_limit(AZURE_DEVOPS_URL)
+    assert clock["sleeps"] == [pytest.approx(1 / RATE), pytest.approx(2 / RATE)]
+
+    # The bucket refills at the request rate
+    clock["now"] += 1
+    clock["sleeps"].clear()
+    for _ in range(RATE - 2):
+        connectors[0]._wait_for_rate_limit(AZURE_DEVOPS_URL)
+    assert clock["sleeps"] == []
+
+
+def test_throttling_changes_the_stored_rate(make_limited_connector, clock, tmp_path):
+    first = make_limited_connector()
+    second = make_limited_connector()
+    first._wait_for_rate_limit(AZURE_DEVOPS_URL)
+
+    # Every 429 halves the rate stored by all the actions, not the rate an action last saw
+    first._adapt_request_rate(make_response(429))
+    assert read_bucket(tmp_path)["rate"] == RATE / 2
+    second._adapt_request_rate(make_response(429))
+    assert read_bucket(tmp_path)["rate"] == RATE / 4
+
+    # A success recovers the rate gradually, applied with the token of the next request
+    first._adapt_request_rate(make_response(200))
+    assert read_bucket(tmp_path)["rate"] == RATE / 4
+    first._wait_for_rate_limit(AZURE_DEVOPS_URL)
+    assert read_bucket(tmp_path)["rate"] == pytest.approx(RATE / 4 + RATE * consts.AZURE_DEVOPS_RATE_LIMIT_RECOVERY_STEP)
+
+    # The remaining budget reported by the service sets the rate, never below the minimum
+    second._adapt_request_rate(make_response(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Limit": "200"}))
+    second._wait_for_rate_limit(AZURE_DEVOPS_URL)
+    assert read_bucket(tmp_path)["rate"] == pytest.approx(RATE * consts.AZURE_DEVOPS_RATE_LIMIT_MIN_FACTOR)
+
+
+def test_responses_of_other_hosts_do_not_change_the_rate(make_limited_connector, clock, tmp_path):
+    connector = make_limited_connector()
+    response = make_response(429)
+    response.url = "https://login.microsoftonline.com/tenant/oauth2/v2.0/token"
+
+    connector._adapt_request_rate(response)
+
+    assert connector._rate_adjustment is None
+    assert not (tmp_path / f"{ASSET_ID}_{consts.RATE_LIMIT_FILE}").exists()
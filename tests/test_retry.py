@@ -0,0 +1,85 @@
+# File: test_retry.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import time
+from email.utils import formatdate
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+import azuredevops_consts as consts
+
+
+NOW = 1735689600.0
+
+
+@pytest.fixture
+def connector(make_connector, connector_module, monkeypatch):
+    monkeypatch.setattr(connector_module.time, "time", lambda: NOW)
+    connector = make_connector()
+    connector._max_retry_wait = 60
+    return connector
+
+
+@pytest.mark.parametrize(
+    ("headers", "delay"),
+    [
+        ({"Retry-After": "7"}, 7),
+        ({"Retry-After": formatdate(NOW + 12, usegmt=True)}, 12),
+        ({"X-RateLimit-Delay": "3.5"}, 3.5),
+        ({"X-RateLimit-Reset": str(int(NOW + 20))}, 20),
+        # Retry-After comes first, then X-RateLimit-Delay, then X-RateLimit-Reset
+        ({"Retry-After": "2", "X-RateLimit-Delay": "5", "X-RateLimit-Reset": str(int(NOW + 9))}, 2),
+        ({"X-RateLimit-Delay": "5", "X-RateLimit-Reset": str(int(NOW + 9))}, 5),
+        # A reset time in the past means the usage is already reset
+        ({"X-RateLimit-Reset": str(int(NOW - 30))}, 0),
+        # A single delay is capped at max_retry_wait
+        ({"Retry-After": "600"}, 60),
+        ({"x-ratelimit-delay": "4"}, 4),
+    ],
+)
+def test_get_retry_delay_honors_the_headers(connector, headers, delay):
+    assert connector._get_retry_delay(0, CaseInsensitiveDict(headers)) == pytest.approx(delay)
+
+
+def test_get_retry_delay_ignores_invalid_headers(connector, monkeypatch):
+    monkeypatch.setattr("random.uniform", lambda low, high: high)
+
+    delay = connector._get_retry_delay(2, CaseInsensitiveDict({"Retry-After": "soon", "X-RateLimit-Delay": "later"}))
+
+    assert delay == consts.AZURE_DEVOPS_RETRY_BACKOFF_BASE * 2**2
+
+
+def test_get_retry_delay_uses_the_jittered_backoff_without_headers(connector, monkeypatch):
+    monkeypatch.setattr("random.uniform", lambda low, high: high)
+
+    delays = [connector._get_retry_delay(attempt) for attempt in range(3)]
+
+    assert delays == [consts.AZURE_DEVOPS_RETRY_BACKOFF_BASE * 2**attempt for attempt in range(3)]
+
+
+def test_get_retry_delay_stops_retrying(connector):
+    assert connector._get_retry_delay(consts.AZURE_DEVOPS_MAX_RETRIES, {"Retry-After": "1"}) is None
+
+    # The delays of all the requests of the action share the max_retry_wait budget
+    assert connector._get_retry_delay(0, {"Retry-After": "45"}) == 45
+    assert connector._get_retry_delay(0, {"Retry-After": "30"}) is None
+    assert connector._get_retry_delay(0, {"Retry-After": "15"}) == 15
+
+    connector._max_retry_wait = 0
+    assert connector._get_retry_delay(0, {"Retry-After": "1"}) is None
+
+
+def test_parse_retry_after_of_a_past_date(connector):
+    assert connector._parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0
@@ -0,0 +1,115 @@
+# File: test_state.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import os
+import threading
+
+import pytest
+from conftest import ASSET_ID
+
+import azuredevops_consts as consts
+
+
+BASE_STATE = {"is_encrypted": True, "iteration_cache": {"shared|": {"updated_at": 1, "response": {"count": 0}}}}
+
+
+def test_save_state_merges_the_cache_entries_of_concurrent_writers(connector_module, make_connector):
+    connector_module._save_app_state(BASE_STATE, ASSET_ID, None)
+    writers = 8
+    barrier = threading.Barrier(writers)
+    results = []
+
+    def write_entry(index):
+        connector = make_connector(BASE_STATE)
+        connector._state["iteration_cache"][f"team{index}|"] = {"updated_at": index, "response": {"count": index}}
+        barrier.wait()
+        results.append(connector._save_state())
+
+    threads = [threading.Thread(target=write_entry, args=(index,)) for index in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * writers
+    iteration_cache = connector_module._load_app_state(ASSET_ID)["iteration_cache"]
+    assert set(iteration_cache) == {"shared|", *(f"team{index}|" for index in range(writers))}
+
+
+def test_save_state_keeps_the_other_keys_and_applies_the_removed_entries(connector_module, make_connector):
+    connector_module._save_app_state(BASE_STATE, ASSET_ID, None)
+    first = make_connector(BASE_STATE)
+    second = make_connector(BASE_STATE)
+
+    first._state[consts.AZURE_DEVOPS_POLL_CHECKPOINT] = {"watermark": "2025-01-01T00:00:00.000000Z", "last_id": 1}
+    del second._state["iteration_cache"]["shared|"]
+    second._state["iteration_cache"]["team|"] = {"updated_at": 2, "response": {"count": 2}}
+
+    assert first._save_state()
+    assert second._save_state()
+
+    state = connector_module._load_app_state(ASSET_ID)
+    assert state[consts.AZURE_DEVOPS_POLL_CHECKPOINT]["last_id"] == 1
+    assert set(state["iteration_cache"]) == {"team|"}
+
+
+def test_merge_state_entries(connector_module):
+    current = {"a": 1, "b": 2, "c": 3}
+    saved = {"a": 1, "b": 2}
+    entries = {"a": 10, "d": 4}
+
+    assert connector_module._merge_state_entries(current, saved, entries) == {"a": 10, "c": 3, "d": 4}
+    assert connector_module._merge_state_entries(None, None, {"a": 1}) == {"a": 1}
+
+
+def test_save_state_fails_when_the_lock_file_cannot_be_opened(connector_module, make_connector, tmp_path):
+    os.mkdir(tmp_path / f"{ASSET_ID}_{consts.STATE_LOCK_FILE}")
+    connector = make_connector(BASE_STATE)
+    connector._state["iteration_cache"]["team|"] = {"updated_at": 2, "response": {"count": 2}}
+
+    assert not connector._save_state()
+    assert connector.get_status_message() == consts.AZURE_DEVOPS_STATE_LOCK_ERROR
+    assert not (tmp_path / f"{ASSET_ID}_state.json").exists()
+
+
+def test_write_file_atomically_keeps_the_mode(connector_module, tmp_path):
+    file_path = tmp_path / "file.json"
+    connector_module._write_file_atomically(str(file_path), "first")
+    assert os.stat(file_path).st_mode & 0o7777 == consts.STATE_FILE_MODE
+
+    os.chmod(file_path, 0o640)
+    connector_module._write_file_atomically(str(file_path), "second")
+
+    assert file_path.read_text() == "second"
+    assert os.stat(file_path).st_mode & 0o7777 == 0o640
+    assert os.listdir(tmp_path) == ["file.json"]
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason="giving the file to another user requires root")
+def test_write_file_atomically_rewrites_in_place_when_the_owner_cannot_be_kept(connector_module, tmp_path, monkeypatch):
+    file_path = tmp_path / "file.json"
+    file_path.write_text("a longer first content")
+    os.chown(file_path, 65534, 65534)
+    inode = os.stat(file_path).st_ino
+
+    def refuse_chown(*args):
+        raise PermissionError("Operation not permitted")
+
+    monkeypatch.setattr(connector_module.os, "chown", refuse_chown)
+    connector_module._write_file_atomically(str(file_path), "second")
+
+    file_stat = os.stat(file_path)
+    assert file_path.read_text() == "second"
+    assert (file_stat.st_ino, file_stat.st_uid, file_stat.st_gid) == (inode, 65534, 65534)
+    assert os.listdir(tmp_path) == ["file.json"]
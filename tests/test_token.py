@@ -0,0 +1,117 @@
+# File: test_token.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import threading
+import time
+
+import pytest
+from conftest import ASSET_ID, FakeActionResult
+
+import azuredevops_consts as consts
+
+
+EXPIRED_STATE = {
+    "is_encrypted": True,
+    "token": {"access_token": "encrypted:old", "refresh_token": "encrypted:refresh-old", "expires_on": 0},
+}
+
+
+@pytest.fixture
+def token_requests(connector_module, monkeypatch):
+    """Replace the token request, every call returns a new token after a short delay."""
+    token_requests = []
+    lock = threading.Lock()
+
+    def get_token(connector, action_result):
+        with lock:
+            token_requests.append(connector)
+            number = len(token_requests)
+        time.sleep(0.2)
+        connector.update_state_from_response({"access_token": f"new-{number}", "refresh_token": f"refresh-{number}", "expires_in": "3599"})
+        return True
+
+    monkeypatch.setattr(connector_module.AzureDevopsConnector, "_get_token", get_token)
+    return token_requests
+
+
+@pytest.fixture
+def make_expired_connector(connector_module, make_connector):
+    connector_module._save_app_state(EXPIRED_STATE, ASSET_ID, None)
+
+    def make_expired_connector():
+        connector = make_connector(EXPIRED_STATE)
+        connector._access_token = "old"
+        connector._refresh_token = "refresh-old"
+        return connector
+
+    return make_expired_connector
+
+
+def test_concurrent_actions_share_one_token_refresh(connector_module, make_expired_connector, token_requests):
+    connectors = [make_expired_connector() for _ in range(6)]
+    barrier = threading.Barrier(len(connectors))
+    results = {}
+
+    def refresh(connector):
+        barrier.wait()
+        results[connector] = connector._get_token_single_flight(FakeActionResult(), "old")
+
+    threads = [threading.Thread(target=refresh, args=(connector,)) for connector in connectors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(token_requests) == 1
+    assert all(results[connector] for connector in connectors)
+    assert {connector._access_token for connector in connectors} == {"new-1"}
+    assert {connector._refresh_token for connector in connectors} == {"refresh-1"}
+    assert connector_module._load_app_state(ASSET_ID)["token"]["access_token"] == "encrypted:new-1"
+
+
+def test_lock_timeout_fails_without_requesting_a_token(connector_module, make_expired_connector, token_requests, monkeypatch):
+    monkeypatch.setattr(consts, "TOKEN_LOCK_TIMEOUT", 0.2)
+    connector = make_expired_connector()
+    action_result = FakeActionResult()
+
+    with connector_module._asset_file_lock(ASSET_ID, consts.TOKEN_LOCK_FILE):
+        assert not connector._get_token_single_flight(action_result, "old")
+
+    assert token_requests == []
+    assert action_result.get_message().startswith(consts.AZURE_DEVOPS_TOKEN_LOCK_ERROR)
+    assert connector._access_token == "old"
+
+
+def test_lock_timeout_uses_the_token_saved_in_the_meantime(connector_module, make_expired_connector, token_requests, monkeypatch):
+    monkeypatch.setattr(consts, "TOKEN_LOCK_TIMEOUT", 0.2)
+    connector = make_expired_connector()
+
+    with connector_module._asset_file_lock(ASSET_ID, consts.TOKEN_LOCK_FILE):
+        saved_state = dict(EXPIRED_STATE, token={"access_token": "encrypted:saved", "expires_on": time.time() + 3600})
+        connector_module._save_app_state(saved_state, ASSET_ID, None)
+        assert connector._get_token_single_flight(FakeActionResult(), "old")
+
+    assert token_requests == []
+    assert connector._access_token == "saved"
+    # The saved token has no refresh token, the refresh token of the action is kept
+    assert connector._refresh_token == "refresh-old"
+
+
+def test_failed_token_save_fails_the_refresh(make_expired_connector, token_requests, monkeypatch):
+    connector = make_expired_connector()
+    monkeypatch.setattr(connector, "_save_state", lambda: False)
+    action_result = FakeActionResult()
+
+    assert not connector._get_token_single_flight(action_result, "old")
+    assert action_result.get_message() == consts.AZURE_DEVOPS_TOKEN_SAVE_ERROR
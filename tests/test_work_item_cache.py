@@ -0,0 +1,155 @@
+# File: test_work_item_cache.py
+#
+# Copyright (c) 2022-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import sqlite3
+
+import pytest
+from conftest import ASSET_ID, FakeActionResult
+
+import azuredevops_consts as consts
+
+
+TTL = 60
+PARAMS = {"$expand": "None"}
+
+
+class FakeWorkItems:
+    """Answers the get work item requests, the full work item or only its revision."""
+
+    def __init__(self):
+        self.revs = {}
+        self.requests = []
+
+    def make_rest_call_helper(self, endpoint, action_result, params=None, **kwargs):
+        work_item_id = int(endpoint.rsplit("/", 1)[1])
+        rev = self.revs.setdefault(work_item_id, 1)
+        self.requests.append((work_item_id, params))
+        if params == {"fields": "System.Rev"}:
+            return True, {"id": work_item_id, "rev": rev, "fields": {"System.Rev": rev}}
+        return True, {"id": work_item_id, "rev": rev, "fields": {"System.Title": f"Work item {work_item_id} rev {rev}"}}
+
+
+@pytest.fixture
+def clock(connector_module, monkeypatch):
+    clock = {"now": 1735689600.0}
+    monkeypatch.setattr(connector_module.time, "time", lambda: clock["now"])
+    return clock
+
+
+@pytest.fixture
+def make_cached_connector(make_connector, monkeypatch):
+    service = FakeWorkItems()
+
+    def make_cached_connector(max_items=consts.WORK_ITEM_CACHE_DEFAULT_MAX_ITEMS):
+        connector = make_connector()
+        connector._organization = "org"
+        connector._project = "project"
+        connector._work_item_cache = True
+        connector._work_item_cache_ttl = TTL
+        connector._work_item_cache_max_items = max_items
+        monkeypatch.setattr(connector, "_make_rest_call_helper", service.make_rest_call_helper)
+        return connector
+
+    make_cached_connector.service = service
+    return make_cached_connector
+
+
+def get_work_item(connector, work_item_id):
+    ret_val, work_item, cache_status = connector._get_cached_work_item(FakeActionResult(), work_item_id, dict(PARAMS))
+    assert ret_val
+    return work_item, cache_status
+
+
+def test_cached_work_item_is_revalidated_after_the_ttl(make_cached_connector, clock):
+    connector = make_cached_connector()
+    service = make_cached_connector.service
+
+    assert get_work_item(connector, 1) == ({"id": 1, "rev": 1, "fields": {"System.Title": "Work item 1 rev 1"}}, consts.WORK_ITEM_CACHE_MISS)
+
+    clock["now"] += TTL - 1
+    assert get_work_item(connector, 1)[1] == consts.WORK_ITEM_CACHE_HIT
+    assert len(service.requests) == 1
+
+    # After the TTL only the revision is requested, the cached work item is served while it is current
+    clock["now"] += 2
+    work_item, cache_status = get_work_item(connector, 1)
+    assert cache_status == consts.WORK_ITEM_CACHE_REVALIDATED
+    assert work_item["fields"]["System.Title"] == "Work item 1 rev 1"
+    assert service.requests[-1] == (1, {"fields": "System.Rev"})
+
+    # The revalidation restarts the TTL
+    clock["now"] += TTL - 1
+    assert get_work_item(connector, 1)[1] == consts.WORK_ITEM_CACHE_HIT
+
+    clock["now"] += 2
+    service.revs[1] = 2
+    work_item, cache_status = get_work_item(connector, 1)
+    assert cache_status == consts.WORK_ITEM_CACHE_MISS
+    assert work_item["fields"]["System.Title"] == "Work item 1 rev 2"
+
+
+def test_cache_is_shared_by_the_runs_of_the_asset(make_cached_connector, clock):
+    first = make_cached_connector()
+    get_work_item(first, 1)
+    first._close_work_item_cache()
+
+    assert get_work_item(make_cached_connector(), 1)[1] == consts.WORK_ITEM_CACHE_HIT
+
+
+def test_least_recently_used_work_items_are_evicted(make_cached_connector, clock):
+    connector = make_cached_connector(max_items=2)
+
+    for work_item_id in (1, 2):
+        get_work_item(connector, work_item_id)
+        clock["now"] += 1
+    # Using work item 1 makes work item 2 the least recently used one
+    get_work_item(connector, 1)
+    clock["now"] += 1
+    get_work_item(connector, 3)
+
+    assert [get_work_item(connector, work_item_id)[1] for work_item_id in (1, 3, 2)] == [
+        consts.WORK_ITEM_CACHE_HIT,
+        consts.WORK_ITEM_CACHE_HIT,
+        consts.WORK_ITEM_CACHE_MISS,
+    ]
+
+
+def test_cached_work_items_are_encrypted(make_cached_connector, clock, tmp_path):
+    connector = make_cached_connector()
+    get_work_item(connector, 1)
+    connector._close_work_item_cache()
+
+    with sqlite3.connect(tmp_path / f"{ASSET_ID}_{consts.WORK_ITEM_CACHE_FILE}") as connection:
+        (data,) = connection.execute("SELECT data FROM work_items").fetchone()
+    assert data.startswith("encrypted:")
+
+    # A row that cannot be decrypted is a cache miss and is replaced
+    with sqlite3.connect(tmp_path / f"{ASSET_ID}_{consts.WORK_ITEM_CACHE_FILE}") as connection:
+        connection.execute("UPDATE work_items SET data = 'not encrypted'")
+    connector = make_cached_connector()
+    assert get_work_item(connector, 1)[1] == consts.WORK_ITEM_CACHE_MISS
+
+
+def test_one_connection_per_run(make_cached_connector, clock, connector_module, monkeypatch):
+    connections = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(connector_module.sqlite3, "connect", lambda *args, **kwargs: connections.append(args) or connect(*args, **kwargs))
+
+    connector = make_cached_connector()
+    for work_item_id in (1, 2, 1, 2):
+        get_work_item(connector, work_item_id)
+    connector._close_work_item_cache()
+
+    assert len(connections) == 1
+    assert connector._work_item_cache_connection is None